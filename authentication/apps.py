@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class AuthenticationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'authentication'
+
+    def ready(self):
+        from django.contrib.auth.password_validation import get_default_password_validators
+
+        from . import signals  # noqa: F401
+
+        # Build the validators, reading the list of common passwords, before the first signup.
+        get_default_password_validators()
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def user_key(user_id) -> str:
+    return f'user:{user_id}'
+
+
+def invalidate(user_ids):
+    """
+    Drop the cached users, after they were saved or their rows were updated.
+    :param user_ids: IDs of the changed users.
+    """
+    cache.delete_many([user_key(user_id) for user_id in set(user_ids)])
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    Authentication backend reading the user of each request from the cache, so that
+    a logged-in request needs no query to know its user. The cached user is dropped
+    whenever it is saved, which includes a change of password: the sessions are then
+    checked again against the new password hash. With a cache local to each process,
+    the other processes only see the change when their copy expires, after
+    USER_CACHE_TIMEOUT seconds.
+    """
+
+    def get_user(self, user_id):
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user
@@ -0,0 +1,29 @@
+"""
+Password hashers whose cost is read from the settings, so that it can be tuned
+per deployment. A stored hash of another cost is rehashed with the current one
+the next time its user logs in.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, ScryptPasswordHasher
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with PBKDF2_ITERATIONS rounds, or those of Django when it is None.
+    It shares its algorithm name with the default hasher of Django, so the existing
+    hashes are checked as before.
+    """
+
+    @property
+    def iterations(self):
+        return settings.PBKDF2_ITERATIONS or PBKDF2PasswordHasher.iterations
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """
+    scrypt with a CPU and memory cost of SCRYPT_WORK_FACTOR, or that of Django when it is None.
+    """
+
+    @property
+    def work_factor(self):
+        return settings.SCRYPT_WORK_FACTOR or ScryptPasswordHasher.work_factor
@@ -1,5 +1,17 @@
 from django.contrib.auth.models import AbstractUser
+from django.db import models
 
 
 class User(AbstractUser):
-    pass
+    # Counters maintained on every write by blog.counters, see the repair_counters command
+    follower_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+
+    @property
+    def average_rating(self):
+        """
+        Average rating of the reviews of the user, or None if they wrote none.
+        """
+        return self.rating_sum / self.review_count if self.review_count else None
@@ -0,0 +1,65 @@
+"""
+Bounded pool of threads checking the passwords of the logins.
+
+Hashing a password takes a fraction of a second of CPU. The logins are checked by
+LOGIN_WORKERS threads, and at most LOGIN_QUEUE more wait for one of them: beyond
+that, a login is refused at once instead of holding one more request worker, so a
+burst of logins cannot take every worker away from the other pages.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore, Lock
+
+from django.conf import settings
+from django.contrib.auth import authenticate as django_authenticate
+from django.db import close_old_connections
+
+_executor = None
+_slots = None
+_executor_lock = Lock()
+
+
+class PoolSaturated(Exception):
+    pass
+
+
+def get_executor():
+    """
+    Return the pool of threads and the semaphore bounding the logins it holds, created on first use.
+    """
+    global _executor, _slots
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.LOGIN_WORKERS, thread_name_prefix='login')
+            _slots = BoundedSemaphore(settings.LOGIN_WORKERS + settings.LOGIN_QUEUE)
+    return _executor, _slots
+
+
+def _run_in_worker(request, credentials: dict):
+    close_old_connections()
+    try:
+        return django_authenticate(request, **credentials)
+    finally:
+        close_old_connections()
+
+
+def authenticate(request=None, **credentials):
+    """
+    Check credentials in the pool, waiting for the result. With LOGIN_WORKERS set to 0
+    they are checked in the current thread.
+    :param request: HTTP request object, passed to the authentication backends.
+    :param credentials: the username and password.
+    :return: the authenticated user, or None.
+    :raise PoolSaturated: when every worker is busy and the queue is full.
+    """
+    if not settings.LOGIN_WORKERS:
+        return django_authenticate(request, **credentials)
+    executor, slots = get_executor()
+    if not slots.acquire(blocking=False):
+        raise PoolSaturated
+    try:
+        future = executor.submit(_run_in_worker, request, credentials)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future.result()
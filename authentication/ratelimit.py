@@ -0,0 +1,166 @@
+"""
+Rate limiting of the logins and signups, per client IP address and per username.
+
+Each limit allows a number of attempts over a sliding window. Attempts are counted
+in the 'ratelimit' cache by fixed windows with atomic increments, and the count of
+the sliding window is estimated from the current and previous fixed windows, the
+previous one weighted by its share still within the sliding window. Refused
+attempts are not counted, so a client is allowed again as soon as its earlier
+attempts leave the window, and nobody can keep another user locked out.
+"""
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpRequest
+from django.shortcuts import render
+
+CACHE_ALIAS = 'ratelimit'
+OUTCOMES = ('allowed', 'rejected')
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def increment(key: str, timeout=None) -> int:
+    """
+    Increment a counter of the cache, creating it if needed.
+    :return: the new value.
+    """
+    cache = get_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout):
+            return 1
+        return cache.incr(key)
+
+
+def client_ip(request: HttpRequest) -> str:
+    """
+    Address of the client, read from RATE_LIMIT_IP_HEADER. Behind a reverse proxy,
+    the last address of X-Forwarded-For is the one added by the proxy.
+    """
+    value = request.META.get(settings.RATE_LIMIT_IP_HEADER, '')
+    return value.rsplit(',', 1)[-1].strip()
+
+
+def counter_key(view: str, scope: str, value: str) -> str:
+    digest = hashlib.blake2b(value.encode(), digest_size=12).hexdigest()
+    return f'ratelimit:{view}:{scope}:{digest}'
+
+
+def hit(key: str, limit: int, window: int, now=None) -> int:
+    """
+    Count an attempt against a limit, unless it is refused.
+    :param key: key of the counters of the client.
+    :param limit: attempts allowed within the window.
+    :param window: duration of the sliding window in seconds.
+    :param now: current timestamp, for tests.
+    :return: 0 if the attempt is allowed, else the seconds to wait before retrying.
+    """
+    now = time.time() if now is None else now
+    index, elapsed = divmod(now, window)
+    # Incrementing first keeps concurrent attempts from all slipping under the limit.
+    current = increment(f'{key}:{int(index)}', 2 * window)
+    previous = get_cache().get(f'{key}:{int(index) - 1}', 0)
+    if previous * (window - elapsed) / window + current <= limit:
+        return 0
+    uncount(key, window, now)
+    return wait_time(previous, current - 1, limit, window, elapsed)
+
+
+def uncount(key: str, window: int, now: float):
+    """
+    Take back an attempt counted by hit at the same time, once it is refused.
+    """
+    try:
+        get_cache().decr(f'{key}:{int(now // window)}')
+    except ValueError:
+        # The counter expired in the meantime.
+        pass
+
+
+def wait_time(previous: int, current: int, limit: int, window: int, elapsed: float) -> int:
+    """
+    Compute the seconds to wait before an attempt is allowed, if no other attempt is made.
+    :param previous: attempts counted in the previous fixed window.
+    :param current: attempts counted in the current fixed window.
+    :param limit: attempts allowed within the window.
+    :param window: duration of the sliding window in seconds.
+    :param elapsed: seconds elapsed since the start of the current fixed window.
+    """
+    room = limit - current - 1
+    if room >= 0 and previous:
+        # The weight of the previous window decays enough within the current one.
+        wait = window - elapsed - room * window / previous
+    else:
+        # The current window becomes the previous one, whose weight must decay enough.
+        wait = window - elapsed + max(0.0, window * (1 - (limit - 1) / current)) if current else 0
+    return max(1, math.ceil(wait))
+
+
+def count(view: str, outcome: str):
+    increment(f'ratelimit:stats:{view}:{outcome}')
+
+
+def get_stats() -> dict:
+    """
+    Read the counters of the attempts allowed and refused, for each limited view.
+    :return: a dict of counters by view.
+    """
+    keys = {(view, outcome): f'ratelimit:stats:{view}:{outcome}'
+            for view in settings.RATE_LIMITS for outcome in OUTCOMES}
+    values = get_cache().get_many(keys.values())
+    return {view: {outcome: values.get(keys[view, outcome], 0) for outcome in OUTCOMES}
+            for view in settings.RATE_LIMITS}
+
+
+def check_limits(request: HttpRequest, view: str) -> int:
+    """
+    Count a submission of a limited view against its limits, see RATE_LIMITS.
+    :param request: HTTP request object.
+    :param view: name of the limited view.
+    :return: 0 if the submission is allowed, else the seconds to wait before retrying.
+    """
+    values = {'ip': client_ip(request), 'username': request.POST.get('username', '').strip().lower()}
+    now = time.time()
+    wait = 0
+    allowed = []
+    for scope, (limit, window) in settings.RATE_LIMITS.get(view, {}).items():
+        if values[scope]:
+            key = counter_key(view, scope, values[scope])
+            scope_wait = hit(key, limit, window, now)
+            if not scope_wait:
+                allowed.append((key, window))
+            wait = max(wait, scope_wait)
+    if wait:
+        # A refused submission counts against none of the limits.
+        for key, window in allowed:
+            uncount(key, window, now)
+    return wait
+
+
+def rate_limit(view_name: str):
+    """
+    Decorate a view handling a form: its submissions beyond the limits are refused with
+    a 429 response, before the form is validated.
+    :param view_name: name of the limits of the view in RATE_LIMITS.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method == 'POST':
+                wait = check_limits(request, view_name)
+                count(view_name, 'rejected' if wait else 'allowed')
+                if wait:
+                    response = render(request, 'authentication/rate_limited.html', status=429)
+                    response['Retry-After'] = wait
+                    return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,24 @@
+from functools import partial
+
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import backends
+from .models import User
+
+
+# The cached user is dropped once the transaction is committed, so that a request
+# running in between cannot cache the row as it was before the write.
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    transaction.on_commit(partial(backends.invalidate, [instance.pk]))
+
+
+@receiver(user_logged_out)
+def user_logged_out_uncache(sender, request, user, **kwargs):
+    if user is not None:
+        backends.invalidate([user.pk])
@@ -1,3 +1,233 @@
-from django.test import TestCase
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, ScryptPasswordHasher, identify_hasher
+from django.core.exceptions import ValidationError
+from django.core.cache import cache, caches
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from blog import models
+from . import backends, hashers, pool, ratelimit, validators
+from .models import User
+
+
+class CachedUserTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user(username='alice', password='pass')
+        cls.bob = User.objects.create_user(username='bob', password='pass')
+
+    def setUp(self):
+        for alias in ('default', 'sessions'):
+            caches[alias].clear()
+        self.client.force_login(self.alice)
+        self.client.get(reverse('my_tickets'))
+
+    def test_logged_in_requests_read_neither_session_nor_user(self):
+        with self.assertNumQueries(1):
+            self.client.get(reverse('my_tickets'))
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_signed_cookie_sessions(self):
+        # The session middleware reads the engine when the client is created.
+        client = self.client_class()
+        client.force_login(self.alice)
+        with self.assertNumQueries(1):
+            self.assertEqual(client.get(reverse('my_tickets')).status_code, 200)
+
+    def test_password_change_logs_other_sessions_out(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.set_password('nouveau')
+            self.alice.save()
+        response = self.client.get(reverse('my_tickets'))
+        self.assertRedirects(response, f"{reverse('login')}?next={reverse('my_tickets')}")
+
+    def test_logout_drops_the_cached_user(self):
+        self.assertIsNotNone(cache.get(backends.user_key(self.alice.id)))
+        self.client.get(reverse('logout'))
+        self.assertIsNone(cache.get(backends.user_key(self.alice.id)))
+
+    def test_counters_are_read_fresh(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            models.UserFollows.objects.create(user=self.bob, followed_user=self.alice)
+        self.assertEqual(self.client.get(reverse('follow_users')).context['user'].follower_count, 1)
+
+
+@override_settings(PBKDF2_ITERATIONS=1000, SCRYPT_WORK_FACTOR=2 ** 10, LOGIN_WORKERS=0)
+class PasswordHashingTests(TestCase):
+    def setUp(self):
+        for alias in ('default', 'ratelimit'):
+            caches[alias].clear()
+        self.user = User.objects.create_user(username='alice', password='Motdepasse1!')
+
+    def login(self, password='Motdepasse1!'):
+        return self.client.post(reverse('login'), {'username': 'alice', 'password': password})
+
+    def stored_hash(self) -> dict:
+        self.user.refresh_from_db()
+        return identify_hasher(self.user.password).decode(self.user.password)
+
+    def test_login_rehashes_with_the_new_cost(self):
+        with override_settings(PBKDF2_ITERATIONS=2000):
+            self.assertRedirects(self.login(), reverse('home'), fetch_redirect_response=False)
+        self.assertEqual(self.stored_hash()['iterations'], 2000)
+
+    def test_login_rehashes_with_the_new_profile(self):
+        hashers = [settings.PASSWORD_HASHER_PROFILES['scrypt'], settings.PASSWORD_HASHER_PROFILES['pbkdf2']]
+        with override_settings(PASSWORD_HASHERS=hashers):
+            self.login()
+            self.assertEqual(self.stored_hash()['algorithm'], 'scrypt')
+            self.client.logout()
+            self.assertRedirects(self.login(), reverse('home'), fetch_redirect_response=False)
+
+    @override_settings(PBKDF2_ITERATIONS=None, SCRYPT_WORK_FACTOR=None)
+    def test_costs_default_to_those_of_django(self):
+        self.assertEqual(hashers.TunedPBKDF2PasswordHasher().iterations, PBKDF2PasswordHasher.iterations)
+        self.assertEqual(hashers.TunedScryptPasswordHasher().work_factor, ScryptPasswordHasher.work_factor)
+
+    def test_failed_login_keeps_the_hash(self):
+        password = self.user.password
+        with override_settings(PBKDF2_ITERATIONS=2000):
+            self.assertEqual(self.login(password='faux').status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password, password)
+
+
+@override_settings(PBKDF2_ITERATIONS=1000, LOGIN_WORKERS=1)
+class LoginPoolTests(TransactionTestCase):
+    def setUp(self):
+        for alias in ('default', 'ratelimit'):
+            caches[alias].clear()
+        User.objects.create_user(username='alice', password='Motdepasse1!')
+
+    def login(self):
+        return self.client.post(reverse('login'), {'username': 'alice', 'password': 'Motdepasse1!'})
+
+    def test_login_in_the_pool(self):
+        self.assertRedirects(self.login(), reverse('home'), fetch_redirect_response=False)
+
+    def test_full_pool_refuses_logins(self):
+        _, slots = pool.get_executor()
+        held = 0
+        while slots.acquire(blocking=False):
+            held += 1
+        try:
+            response = self.login()
+        finally:
+            for _ in range(held):
+                slots.release()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], str(settings.LOGIN_RETRY_AFTER))
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+
+class PasswordValidationTests(TestCase):
+    def setUp(self):
+        caches['ratelimit'].clear()
+
+    def test_missing_character_classes_are_reported_at_once(self):
+        with self.assertRaises(ValidationError) as raised:
+            validators.CharacterClassesValidator().validate('1234')
+        self.assertEqual(
+            [error.code for error in raised.exception.error_list],
+            ['password_no_letters', 'password_no_uppercase', 'password_no_lowercase', 'password_no_special'],
+        )
+
+    def test_character_class_validators_define_their_class(self):
+        with self.assertRaises(TypeError):
+            validators.CharacterClassValidator()
+        with self.assertRaises(ValidationError):
+            validators.ContainsSpecialCharacterValidator().validate('Motdepasse1')
+
+    def test_password_with_every_character_class(self):
+        validators.CharacterClassesValidator().validate('Motdepasse1!')
+
+    def test_only_the_missing_class_is_reported(self):
+        with self.assertRaises(ValidationError) as raised:
+            validators.CharacterClassesValidator().validate('motdepasse1!')
+        self.assertEqual([error.code for error in raised.exception.error_list], ['password_no_uppercase'])
+
+    def test_common_passwords_are_shared(self):
+        first = validators.PreloadedCommonPasswordValidator()
+        self.assertIs(validators.PreloadedCommonPasswordValidator().passwords, first.passwords)
+        with self.assertRaises(ValidationError):
+            first.validate('Password')
+
+    @override_settings(PBKDF2_ITERATIONS=1000)
+    def test_signup_lists_every_error(self):
+        response = self.client.post(reverse('signup'), {
+            'username': 'carol', 'email': 'carol@example.com',
+            'password1': 'azertyuiop', 'password2': 'azertyuiop',
+        })
+        self.assertEqual(response.status_code, 200)
+        errors = response.context['form'].errors.as_data()['password2']
+        self.assertEqual({error.code for error in errors},
+                         {'password_too_common', 'password_no_uppercase', 'password_no_special'})
+        self.assertFalse(User.objects.filter(username='carol').exists())
+
+
+@override_settings(RATE_LIMITS={'login': {'ip': (3, 60), 'username': (2, 60)}, 'signup': {'ip': (1, 60)}})
+class RateLimitTests(TestCase):
+    def setUp(self):
+        caches['ratelimit'].clear()
+
+    def login(self, username='alice', address='127.0.0.1'):
+        return self.client.post(reverse('login'), {'username': username, 'password': 'faux'}, REMOTE_ADDR=address)
+
+    def test_logins_beyond_the_ip_limit_are_refused_before_hashing(self):
+        for username in ('alice', 'bob', 'carol'):
+            self.assertEqual(self.login(username).status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.login('dave')
+        self.assertEqual(response.status_code, 429)
+        # Until the end of the window, then until a third of the attempts left the sliding window
+        self.assertTrue(1 <= int(response['Retry-After']) <= 60 + 20)
+        self.assertEqual(self.login('dave', address='10.0.0.2').status_code, 200)
+
+    def test_logins_beyond_the_username_limit_are_refused_from_any_address(self):
+        self.login(address='10.0.0.1')
+        self.login(address='10.0.0.2')
+        self.assertEqual(self.login('Alice', address='10.0.0.3').status_code, 429)
+        self.assertEqual(self.login('bob', address='10.0.0.3').status_code, 200)
+        # The refused login did not count against the address.
+        self.assertEqual(self.login('carol', address='10.0.0.3').status_code, 200)
+        self.assertEqual(self.login('dave', address='10.0.0.3').status_code, 200)
+
+    def test_signups_are_limited(self):
+        data = {'username': 'carol', 'password1': 'a', 'password2': 'b'}
+        self.assertEqual(self.client.post(reverse('signup'), data).status_code, 200)
+        self.assertEqual(self.client.post(reverse('signup'), data).status_code, 429)
+        self.assertEqual(self.client.get(reverse('signup')).status_code, 200)
+
+    def test_sliding_window(self):
+        self.assertEqual(ratelimit.hit('key', 2, 60, now=0), 0)
+        self.assertEqual(ratelimit.hit('key', 2, 60, now=1), 0)
+        # Both attempts count until half of the previous window left the sliding window.
+        self.assertEqual(ratelimit.hit('key', 2, 60, now=2), 88)
+        self.assertEqual(ratelimit.hit('key', 2, 60, now=3), 87)
+        self.assertEqual(ratelimit.hit('key', 2, 60, now=89), 1)
+        self.assertEqual(ratelimit.hit('key', 2, 60, now=90), 0)
+        self.assertEqual(ratelimit.hit('key', 2, 60, now=91), 29)
+        self.assertEqual(ratelimit.hit('key', 2, 60, now=120), 0)
+
+    def test_retrying_after_the_wait_is_allowed(self):
+        wait = max(ratelimit.hit('user', 10, 300, now=10 + index) for index in range(11))
+        self.assertEqual(wait, 310)
+        self.assertNotEqual(ratelimit.hit('user', 10, 300, now=20 + wait - 1), 0)
+        self.assertEqual(ratelimit.hit('user', 10, 300, now=20 + wait), 0)
+
+    @override_settings(RATE_LIMIT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_address_added_by_the_proxy(self):
+        for _ in range(3):
+            self.client.post(reverse('login'), HTTP_X_FORWARDED_FOR='1.1.1.1, 10.0.0.1')
+        response = self.client.post(reverse('login'), HTTP_X_FORWARDED_FOR='2.2.2.2, 10.0.0.1')
+        self.assertEqual(response.status_code, 429)
+
+    def test_stats(self):
+        self.login()
+        self.login()
+        self.login()
+        self.assertEqual(ratelimit.get_stats(), {'login': {'allowed': 2, 'rejected': 1},
+                                                 'signup': {'allowed': 0, 'rejected': 0}})
+        self.assertEqual(self.client.get(reverse('rate_limit_stats')).status_code, 302)
+        self.client.force_login(User.objects.create_user(username='admin', is_staff=True))
+        self.assertEqual(self.client.get(reverse('rate_limit_stats')).json()['login']['rejected'], 1)
@@ -1,49 +1,123 @@
+from abc import ABC, abstractmethod
+from functools import cache
+
+from django.contrib.auth.password_validation import CommonPasswordValidator
 from django.core.exceptions import ValidationError
 
 
-class ContainsLetterValidator:
-    def validate(self, password, user=None):
-        if not any(char.isalpha() for char in password):
-            raise ValidationError(
-                'Le mot de passe doit contenir une lettre', code='password_no_letters')
+class CharacterClassValidator(ABC):
+    """
+    Base of the validators requiring at least one character of a class.
+    """
+    message = ''
+    code = ''
+    help_text = ''
 
-    def get_help_text(self):
-        return 'Votre mot de passe doit contenir au moins une lettre majuscule ou minuscule.'
+    @abstractmethod
+    def contains(self, char) -> bool:
+        """
+        Tell whether a character belongs to the class required by the validator.
+        :param char: a character of the password.
+        :return: True if the character is of the class.
+        """
 
+    def error(self) -> ValidationError:
+        return ValidationError(self.message, code=self.code)
 
-class ContainsUppercaseValidator:
     def validate(self, password, user=None):
-        if not any(char.isupper() for char in password):
-            raise ValidationError(
-                'Le mot de passe doit contenir au moins une lettre majuscule',
-                code='password_no_uppercase'
-            )
+        if not any(self.contains(char) for char in password):
+            raise self.error()
 
     def get_help_text(self):
-        return 'Votre mot de passe doit contenir au moins une lettre majuscule.'
+        return self.help_text
 
 
-class ContainsLowercaseValidator:
-    def validate(self, password, user=None):
-        if not any(char.islower() for char in password):
-            raise ValidationError(
-                'Le mot de passe doit contenir au moins une lettre minuscule',
-                code='password_no_lowercase'
-            )
+class ContainsLetterValidator(CharacterClassValidator):
+    message = 'Le mot de passe doit contenir une lettre'
+    code = 'password_no_letters'
+    help_text = 'Votre mot de passe doit contenir au moins une lettre majuscule ou minuscule.'
 
-    def get_help_text(self):
-        return 'Votre mot de passe doit contenir au moins une lettre minuscule.'
+    def contains(self, char) -> bool:
+        return char.isalpha()
+
+
+class ContainsUppercaseValidator(CharacterClassValidator):
+    message = 'Le mot de passe doit contenir au moins une lettre majuscule'
+    code = 'password_no_uppercase'
+    help_text = 'Votre mot de passe doit contenir au moins une lettre majuscule.'
+
+    def contains(self, char) -> bool:
+        return char.isupper()
+
+
+class ContainsLowercaseValidator(CharacterClassValidator):
+    message = 'Le mot de passe doit contenir au moins une lettre minuscule'
+    code = 'password_no_lowercase'
+    help_text = 'Votre mot de passe doit contenir au moins une lettre minuscule.'
 
+    def contains(self, char) -> bool:
+        return char.islower()
 
-class ContainsSpecialCharacterValidator:
+
+class ContainsSpecialCharacterValidator(CharacterClassValidator):
     special_characters = "!@#$%^&*()+-=[]{}|;:,.<>?"
+    message = 'Le mot de passe doit contenir au moins un caractère spécial (!@#$%^&*()+-=[]{}|;:,.<>?)'
+    code = 'password_no_special'
+    help_text = f'Votre mot de passe doit contenir au moins un caractère spécial parmi : {special_characters}'
+
+    def contains(self, char) -> bool:
+        return char in self.special_characters
+
+
+class CharacterClassesValidator:
+    """
+    Check the classes of the character class validators in a single pass over the
+    password, stopping as soon as every class is found, and report every missing
+    class at once with the errors of those validators.
+    """
+    validator_classes = (
+        ContainsLetterValidator,
+        ContainsUppercaseValidator,
+        ContainsLowercaseValidator,
+        ContainsSpecialCharacterValidator,
+    )
+
+    def __init__(self):
+        self.validators = [validator_class() for validator_class in self.validator_classes]
 
     def validate(self, password, user=None):
-        if not any(char in self.special_characters for char in password):
-            raise ValidationError(
-                'Le mot de passe doit contenir au moins un caractère spécial (!@#$%^&*()+-=[]{}|;:,.<>?)',
-                code='password_no_special'
-            )
+        special_characters = ContainsSpecialCharacterValidator.special_characters
+        letter = uppercase = lowercase = special = False
+        for char in password:
+            letter = letter or char.isalpha()
+            uppercase = uppercase or char.isupper()
+            lowercase = lowercase or char.islower()
+            special = special or char in special_characters
+            if letter and uppercase and lowercase and special:
+                return
+        found = (letter, uppercase, lowercase, special)
+        raise ValidationError([validator.error() for validator, present in zip(self.validators, found) if not present])
 
     def get_help_text(self):
-        return f'Votre mot de passe doit contenir au moins un caractère spécial parmi : {self.special_characters}'
+        return ' '.join(validator.get_help_text() for validator in self.validators)
+
+
+@cache
+def common_passwords(path: str) -> frozenset:
+    """
+    Read a list of common passwords once per process.
+    :param path: path of the list, which may be gzipped.
+    :return: the lowercased passwords.
+    """
+    return frozenset(CommonPasswordValidator(path).passwords)
+
+
+class PreloadedCommonPasswordValidator(CommonPasswordValidator):
+    """
+    CommonPasswordValidator sharing its list between instances, so the list is not
+    decompressed again whenever the validators are rebuilt. It is loaded when the
+    application starts, see AuthenticationConfig.ready.
+    """
+
+    def __init__(self, password_list_path=None):
+        self.passwords = common_passwords(str(password_list_path or self.DEFAULT_PASSWORD_LIST_PATH))
@@ -1,14 +1,18 @@
-from django.http import HttpRequest, HttpResponse
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import render, redirect
-from django.contrib.auth import login, authenticate, logout
+from django.contrib.auth import login, logout
 from django.conf import settings
 
-from . import forms
+from . import forms, pool, ratelimit
 
 
+@ratelimit.rate_limit('login')
 def login_page(request: HttpRequest) -> HttpResponse:
     """
-    Handle user login.
+    Handle user login. The password is checked in the pool of login workers, and the
+    login is refused with a 503 response when the pool is full, or with a 429 response
+    beyond the rate limits.
     :param request:HTTP request Object
     :return: HTTP response rendering the login page with a form and message.
     """
@@ -17,10 +21,18 @@ def login_page(request: HttpRequest) -> HttpResponse:
     if request.method == 'POST':
         form = forms.LoginForm(request.POST)
         if form.is_valid():
-            user = authenticate(
-                username=form.cleaned_data['username'],
-                password=form.cleaned_data['password'],
-            )
+            try:
+                user = pool.authenticate(
+                    request,
+                    username=form.cleaned_data['username'],
+                    password=form.cleaned_data['password'],
+                )
+            except pool.PoolSaturated:
+                message = 'Trop de connexions en cours, veuillez réessayer dans quelques instants.'
+                response = render(request, 'authentication/login.html', context={'form': form, 'message': message},
+                                  status=503)
+                response['Retry-After'] = settings.LOGIN_RETRY_AFTER
+                return response
             if user is not None:
                 login(request, user)
                 return redirect('home')
@@ -38,9 +50,10 @@ def logout_user(request: HttpRequest) -> HttpResponse:
     return redirect('login')
 
 
+@ratelimit.rate_limit('signup')
 def signup_page(request: HttpRequest) -> HttpResponse:
     """
-    Handle user registration.
+    Handle user registration, refused with a 429 response beyond the rate limits.
     :param request: HTTP request object.
     :return: HTTP response rendering the signup page with a form.
     """
@@ -52,3 +65,13 @@ def signup_page(request: HttpRequest) -> HttpResponse:
             login(request, user)
             return redirect(settings.LOGIN_REDIRECT_URL)
     return render(request, 'authentication/signup.html', context={'form': form})
+
+
+@staff_member_required
+def rate_limit_stats(request: HttpRequest) -> HttpResponse:
+    """
+    Expose the counters of the login and signup attempts allowed and refused to the staff.
+    :param request: HTTP request object.
+    :return: JSON response with the counters of the current process, by view.
+    """
+    return JsonResponse(ratelimit.get_stats())
@@ -0,0 +1,66 @@
+"""
+Benchmarks of the LITRevu application.
+
+Each benchmark is a module run with ``python -m benchmarks.<name>``. It works on a
+throwaway test database, so the development database is never modified.
+"""
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+
+@contextmanager
+def benchmark_database(name=None):
+    """
+    Set up Django and create a migrated throwaway database, and a throwaway media
+    directory, for the duration of a benchmark.
+    :param name: file of the database, in memory by default with SQLite.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'webapp.settings')
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    if name:
+        connection.settings_dict['TEST']['NAME'] = name
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def write_results(name: str, results: dict, output=None) -> Path:
+    """
+    Store the results of a benchmark as JSON.
+    :param name: name of the benchmark, used for the default file name.
+    :param results: JSON-serializable results.
+    :param output: path of the file to write, benchmarks/results/<name>.json by default.
+    :return: the path of the written file.
+    """
+    path = Path(output) if output else RESULTS_DIR / f'{name}.json'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2, ensure_ascii=False, default=str))
+    return path
+
+
+def heaviest_user(users):
+    """
+    Pick the user following the most people, whose feed is the heaviest.
+    """
+    from django.contrib.auth import get_user_model
+    from django.db.models import Count
+
+    return get_user_model().objects.filter(id__in=[user.id for user in users]).annotate(
+        follow_count=Count('following')
+    ).order_by('-follow_count').first()
@@ -0,0 +1,103 @@
+"""
+Benchmark the number of logins per second and per core of each hashing profile.
+
+    python -m benchmarks.logins [--duration 5] [--threads 4]
+
+For each profile of PASSWORD_HASHER_PROFILES, with its library installed, and for
+the default cost of Django, a user is created in a throwaway database and logged
+in again and again, from one thread and then from several. Hashing releases the
+GIL, so the logins of several threads are spread over the cores.
+"""
+import argparse
+import importlib.util
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import benchmark_database, write_results
+
+PASSWORD = 'Motdepasse1!'
+
+
+def profiles():
+    """
+    Hashers compared, by name: the profiles of the settings whose library is installed,
+    and the PBKDF2 hasher of Django with its default cost.
+    """
+    from django.conf import settings
+    from django.utils.module_loading import import_string
+
+    hashers = {'django_default': 'django.contrib.auth.hashers.PBKDF2PasswordHasher'}
+    for name, hasher in settings.PASSWORD_HASHER_PROFILES.items():
+        library = import_string(hasher).library
+        if library and importlib.util.find_spec(library) is None:
+            print(f'{name}: {library} is not installed, skipped')
+            continue
+        hashers[name] = hasher
+    return hashers
+
+
+def run_logins(username: str, threads: int, duration: float) -> int:
+    """
+    Log a user in from several threads for some time.
+    :return: the number of successful logins.
+    """
+    from django.contrib.auth import authenticate
+    from django.db import close_old_connections
+
+    deadline = time.perf_counter() + duration
+    counts = []
+    lock = threading.Lock()
+
+    def worker():
+        logins = 0
+        try:
+            while time.perf_counter() < deadline:
+                if authenticate(username=username, password=PASSWORD) is not None:
+                    logins += 1
+        finally:
+            close_old_connections()
+        with lock:
+            counts.append(logins)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for _ in range(threads):
+            executor.submit(worker)
+    return sum(counts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=5, help="Seconds of logins per measure.")
+    parser.add_argument('--threads', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--output', help="JSON file to write, benchmarks/results/logins.json by default.")
+    args = parser.parse_args(argv)
+
+    with benchmark_database():
+        from django.contrib.auth import get_user_model
+        from django.test.utils import override_settings
+
+        cores = os.cpu_count() or 1
+        results = {'parameters': vars(args), 'cores': cores, 'profiles': {}}
+        for name, hasher in profiles().items():
+            with override_settings(PASSWORD_HASHERS=[hasher]):
+                get_user_model().objects.create_user(username=name, password=PASSWORD)
+                single = run_logins(name, 1, args.duration) / args.duration
+                concurrent = run_logins(name, args.threads, args.duration) / args.duration
+
+            results['profiles'][name] = result = {
+                'hasher': hasher,
+                'logins_per_second_one_thread': round(single, 2),
+                'logins_per_second': round(concurrent, 2),
+                'logins_per_second_per_core': round(concurrent / min(args.threads, cores), 2),
+            }
+            print(f'{name:16} one thread {single:7.2f}/s  {args.threads} threads {concurrent:7.2f}/s'
+                  f'  {result["logins_per_second_per_core"]:7.2f}/s per core')
+
+    path = write_results('logins', results, args.output)
+    print(f'Results written to {path}')
+
+
+if __name__ == '__main__':
+    main()
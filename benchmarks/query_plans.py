@@ -0,0 +1,96 @@
+"""
+Record the query plan of every query run by the main blog views.
+
+    python -m benchmarks.query_plans [--users 2000] [--fail-on-scan]
+
+The dataset is seeded in a throwaway database, each view is requested through the
+test client and every captured query is explained. A table or index read from end
+to end instead of searched is reported as a scan, which is how a missing or unused
+index shows up.
+"""
+import argparse
+import re
+import sys
+
+from . import benchmark_database, heaviest_user, write_results
+
+SCAN = re.compile(r'\bSCAN (?:TABLE )?(?!CONSTANT ROW)(\w+)')
+
+
+def explain(connection, sql):
+    """
+    Return the query plan of a captured query, one line per plan step.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+        cursor.execute(f'EXPLAIN {sql}')
+        return [row[0] for row in cursor.fetchall()]
+
+
+def table_scans(connection, plan):
+    """
+    List the tables read from end to end in a query plan.
+    """
+    if connection.vendor == 'sqlite':
+        return [match.group(1) for line in plan for match in [SCAN.search(line)] if match]
+    return [line.split(' on ')[1].split()[0] for line in plan if 'Seq Scan on' in line]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--output', help="JSON file to write, benchmarks/results/query_plans.json by default.")
+    parser.add_argument('--fail-on-scan', action='store_true', help="Exit with an error if a table scan is found.")
+    args = parser.parse_args(argv)
+
+    with benchmark_database() as connection:
+        from django.test import Client
+        from django.test.utils import CaptureQueriesContext
+        from django.urls import reverse
+
+        from blog import dataset, models
+
+        users = dataset.generate(users=args.users, tickets=args.users * 20, reviews=args.users * 10)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        user = heaviest_user(users)
+        ticket = models.Ticket.objects.exclude(user=user).exclude(review__isnull=False).first()
+        client = Client()
+        client.force_login(user)
+
+        views = {
+            'home': reverse('home'),
+            'my_tickets': reverse('my_tickets'),
+            'my_reviews': reverse('my_reviews'),
+            'follow_users': reverse('follow_users'),
+            'create_review': reverse('create_review', args=[ticket.id]),
+        }
+
+        results = {'vendor': connection.vendor, 'users': args.users, 'views': {}}
+        scans = 0
+        for name, url in views.items():
+            with CaptureQueriesContext(connection) as context:
+                client.get(url)
+            queries = []
+            for query in context.captured_queries:
+                if query['sql'].startswith(('SAVEPOINT', 'RELEASE')):
+                    continue
+                plan = explain(connection, query['sql'])
+                found = table_scans(connection, plan)
+                scans += len(found)
+                queries.append({'sql': query['sql'], 'plan': plan, 'table_scans': found})
+                for table in found:
+                    print(f'{name}: table scan on {table}\n    {query["sql"][:200]}')
+            results['views'][name] = queries
+
+    path = write_results('query_plans', results, args.output)
+    print(f'{scans} table scan(s), plans written to {path}')
+    if args.fail_on_scan and scans:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark the rendering of a large page of the feed.
+
+    python -m benchmarks.render [--posts 500] [--iterations 50]
+
+The dataset is generated in a throwaway database, and one page of the feed of the
+user following the most people is loaded once. The page is then rendered, without
+any query, with templates compiled on every render or compiled once by the cached
+loader, and with the cards of the posts rendered again or read from their cache.
+"""
+import argparse
+import statistics
+import time
+
+from . import benchmark_database, heaviest_user, write_results
+from .views import percentile
+
+UNCACHED_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+# Configurations compared, by name: (templates compiled once, cards cached)
+MODES = {
+    'uncached_loader': (False, False),
+    'cached_loader': (True, False),
+    'cached_cards': (True, True),
+}
+
+
+def templates_setting(cached_loader: bool):
+    from django.conf import settings
+
+    templates = [dict(settings.TEMPLATES[0], OPTIONS=dict(settings.TEMPLATES[0]['OPTIONS']))]
+    if not cached_loader:
+        templates[0]['OPTIONS']['loaders'] = UNCACHED_LOADERS
+    return templates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--mean-follows', type=float, default=50)
+    parser.add_argument('--tickets', type=int, default=5000)
+    parser.add_argument('--reviews', type=int, default=2500)
+    parser.add_argument('--posts', type=int, default=500)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--output', help="JSON file to write, benchmarks/results/render.json by default.")
+    args = parser.parse_args(argv)
+
+    with benchmark_database():
+        from django.core.cache import caches
+        from django.db import connection
+        from django.template.loader import render_to_string
+        from django.test import RequestFactory
+        from django.test.utils import CaptureQueriesContext, override_settings
+
+        from blog import dataset, feed, views
+
+        users = dataset.generate(users=args.users, mean_follows=args.mean_follows, tickets=args.tickets,
+                                 reviews=args.reviews)
+        user = heaviest_user(users)
+        posts, _ = feed.get_feed_page(user, page_size=args.posts)
+        views.mark_reviews(posts, user)
+        request = RequestFactory().get('/home/')
+        request.user = user
+        context = {'posts': posts}
+
+        results = {'parameters': vars(args), 'posts': len(posts), 'modes': {}}
+        for name, (cached_loader, cached_cards) in MODES.items():
+            with override_settings(TEMPLATES=templates_setting(cached_loader),
+                                   POST_CARD_TIMEOUT=3600 if cached_cards else 0):
+                render_to_string('blog/home.html', context, request)
+                latencies = []
+                with CaptureQueriesContext(connection) as queries:
+                    for _ in range(args.iterations):
+                        if not cached_cards:
+                            caches['post_cards'].clear()
+                        start = time.perf_counter()
+                        render_to_string('blog/home.html', context, request)
+                        latencies.append((time.perf_counter() - start) * 1000)
+
+            results['modes'][name] = result = {
+                'p50_ms': round(percentile(latencies, 50), 2),
+                'p99_ms': round(percentile(latencies, 99), 2),
+                'mean_ms': round(statistics.mean(latencies), 2),
+                'queries': len(queries),
+            }
+            print(f'{name:16} p50 {result["p50_ms"]:8.2f} ms  p99 {result["p99_ms"]:8.2f} ms'
+                  f'  {result["queries"]} queries')
+
+        baseline = results['modes']['uncached_loader']['p50_ms']
+        print(f'{len(posts)} posts, cards from the cache {baseline / results["modes"]["cached_cards"]["p50_ms"]:.1f}x'
+              f' faster than without any cache')
+
+    path = write_results('render', results, args.output)
+    print(f'Results written to {path}')
+
+
+if __name__ == '__main__':
+    main()
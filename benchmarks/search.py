@@ -0,0 +1,78 @@
+"""
+Benchmark the full-text search on a large synthetic corpus.
+
+    python -m benchmarks.search [--tickets 700000] [--reviews 300000] [--iterations 50]
+
+The dataset is generated in a throwaway database and indexed, then searches of
+common words, rare words, several words and word prefixes are requested through
+the test client by the user following the most people. The time taken to index
+the corpus and the cost of indexing one more post are reported as well.
+"""
+import argparse
+import time
+
+from . import benchmark_database, heaviest_user, write_results
+from .views import measure
+
+QUERIES = {
+    'common_word': 'livre',
+    'rare_word': 'solitude',
+    'two_words': 'roman policier',
+    'prefix': 'myst',
+    'no_match': 'introuvable',
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--mean-follows', type=float, default=50)
+    parser.add_argument('--tickets', type=int, default=700_000)
+    parser.add_argument('--reviews', type=int, default=300_000)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--output', help="JSON file to write, benchmarks/results/search.json by default.")
+    args = parser.parse_args(argv)
+
+    with benchmark_database():
+        from django.test import Client
+        from django.urls import reverse
+
+        from blog import dataset, models, search
+
+        start = time.perf_counter()
+        users = dataset.generate(users=args.users, mean_follows=args.mean_follows, tickets=args.tickets,
+                                 reviews=args.reviews)
+        generation = time.perf_counter() - start
+
+        start = time.perf_counter()
+        count = search.rebuild_index()
+        indexing = time.perf_counter() - start
+        print(f'{count} posts generated in {generation:.0f} s, indexed in {indexing:.0f} s')
+
+        user = heaviest_user(users)
+        client = Client()
+        client.force_login(user)
+
+        results = {'parameters': vars(args), 'posts': count, 'indexing_s': round(indexing, 1), 'queries': {}}
+        for name, query in QUERIES.items():
+            def request(client, index, query=query):
+                return client.get(reverse('search'), {'q': query})
+
+            results['queries'][name] = result = measure(client, request, args.iterations)
+            print(f'{name:12} p50 {result["p50_ms"]:8.2f} ms  p99 {result["p99_ms"]:8.2f} ms'
+                  f'  {result["queries"]:3} queries  peak {result["peak_kib"]} KiB')
+
+        def create_ticket(client, index):
+            return client.post(reverse('create_ticket'), {'title': f'Benchmark {index}',
+                                                          'description': 'Un roman policier captivant'})
+
+        results['create_ticket'] = result = measure(client, create_ticket, args.iterations)
+        print(f'{"create_ticket":12} p50 {result["p50_ms"]:8.2f} ms  p99 {result["p99_ms"]:8.2f} ms'
+              f'  with {models.SearchEntry.objects.count()} posts indexed')
+
+    path = write_results('search', results, args.output)
+    print(f'Results written to {path}')
+
+
+if __name__ == '__main__':
+    main()
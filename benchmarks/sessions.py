@@ -0,0 +1,81 @@
+"""
+Benchmark the cost of authenticating each request, by session engine.
+
+    python -m benchmarks.sessions [--users 1000] [--iterations 50]
+
+The dataset is generated in a throwaway database, then every logged-in page is
+requested with each session engine, with the user read from the cache or from
+the database. The query count of a page includes those loading the session and
+the user, so the lowest count over all pages is the cost of authentication alone.
+"""
+import argparse
+
+from . import benchmark_database, heaviest_user, write_results
+from .views import measure
+
+ENGINES = ('db', 'cached_db', 'signed_cookies')
+
+BACKENDS = {
+    'cached_user': 'authentication.backends.CachedModelBackend',
+    'db_user': 'django.contrib.auth.backends.ModelBackend',
+}
+
+
+def pages():
+    """
+    Logged-in pages of the benchmark, by name.
+    """
+    from django.urls import reverse
+
+    return {
+        'home': lambda client, index: client.get(reverse('home')),
+        'search': lambda client, index: client.get(reverse('search'), {'q': 'livre'}),
+        'follow_users': lambda client, index: client.get(reverse('follow_users')),
+        'my_tickets': lambda client, index: client.get(reverse('my_tickets')),
+        'my_reviews': lambda client, index: client.get(reverse('my_reviews')),
+        'api_feed': lambda client, index: client.get(reverse('api_feed')),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--mean-follows', type=float, default=20)
+    parser.add_argument('--tickets', type=int, default=10_000)
+    parser.add_argument('--reviews', type=int, default=5_000)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--output', help="JSON file to write, benchmarks/results/sessions.json by default.")
+    args = parser.parse_args(argv)
+
+    with benchmark_database():
+        from django.conf import settings
+        from django.test import Client
+        from django.test.utils import override_settings
+
+        from blog import dataset
+
+        users = dataset.generate(users=args.users, mean_follows=args.mean_follows, tickets=args.tickets,
+                                 reviews=args.reviews)
+        user = heaviest_user(users)
+
+        results = {'parameters': vars(args), 'configurations': {}}
+        for engine in ENGINES:
+            for backend_name, backend in BACKENDS.items():
+                name = f'{engine}+{backend_name}'
+                with override_settings(SESSION_ENGINE=settings.SESSION_ENGINES[engine],
+                                       AUTHENTICATION_BACKENDS=[backend]):
+                    # The session middleware reads the engine when the client is created.
+                    client = Client()
+                    client.force_login(user)
+                    measures = {page: measure(client, request, args.iterations) for page, request in pages().items()}
+                floor = min(result['queries'] for result in measures.values())
+                results['configurations'][name] = {'query_floor': floor, 'pages': measures}
+                latencies = '  '.join(f'{page} {result["p50_ms"]:.1f}' for page, result in measures.items())
+                print(f'{name:26} floor {floor} queries  p50 ms: {latencies}')
+
+    path = write_results('sessions', results, args.output)
+    print(f'Results written to {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark the validation of passwords and the latency of the signup page.
+
+    python -m benchmarks.signup [--iterations 200] [--signups 20]
+
+The password validators of the settings are compared to the former ones, which
+listed NumericPasswordValidator twice, decompressed the list of common passwords
+whenever they were built and scanned the password once per character class. For
+each set, the cost of building the validators, of validating a password and of
+a complete signup, password hashing included, is measured.
+"""
+import argparse
+import statistics
+import time
+
+from . import benchmark_database, write_results
+from .views import percentile
+
+PASSWORD = 'Motdepasse1!'
+
+BASELINE_VALIDATORS = [{'NAME': f'django.contrib.auth.password_validation.{name}'} for name in (
+    'UserAttributeSimilarityValidator',
+    'MinimumLengthValidator',
+    'CommonPasswordValidator',
+    'NumericPasswordValidator',
+    'NumericPasswordValidator',
+)] + [{'NAME': f'authentication.validators.{name}'} for name in (
+    'ContainsLetterValidator',
+    'ContainsUppercaseValidator',
+    'ContainsLowercaseValidator',
+    'ContainsSpecialCharacterValidator',
+)]
+
+
+def summarize(latencies) -> dict:
+    return {
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(statistics.mean(latencies), 3),
+    }
+
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200, help="Validations of a password per set.")
+    parser.add_argument('--signups', type=int, default=20, help="Signups per set.")
+    parser.add_argument('--output', help="JSON file to write, benchmarks/results/signup.json by default.")
+    args = parser.parse_args(argv)
+
+    with benchmark_database():
+        from django.conf import settings
+        from django.contrib.auth import password_validation
+        from django.test import Client
+        from django.test.utils import override_settings
+        from django.urls import reverse
+
+        from authentication.models import User
+
+        configurations = {'baseline': BASELINE_VALIDATORS, 'current': settings.AUTH_PASSWORD_VALIDATORS}
+        results = {'parameters': vars(args), 'configurations': {}}
+        for name, validators in configurations.items():
+            with override_settings(AUTH_PASSWORD_VALIDATORS=validators):
+                # The validators are built again, as in a new process, when the setting changes.
+                build_ms = timed(password_validation.get_default_password_validators)
+                user = User(username='alice', email='alice@example.com')
+                validation = [timed(lambda: password_validation.validate_password(PASSWORD, user))
+                              for _ in range(args.iterations)]
+
+                client = Client()
+                signups = []
+                for index in range(args.signups):
+                    data = {'username': f'{name}{index}', 'email': f'{name}{index}@example.com',
+                            'password1': PASSWORD, 'password2': PASSWORD}
+                    signups.append(timed(lambda: client.post(reverse('signup'), data)))
+                    client.logout()
+
+            results['configurations'][name] = result = {
+                'build_ms': round(build_ms, 3),
+                'validation': summarize(validation),
+                'signup': summarize(signups),
+            }
+            print(f'{name:9} build {build_ms:7.2f} ms  validation p50 {result["validation"]["p50_ms"]:6.3f} ms'
+                  f'  signup p50 {result["signup"]["p50_ms"]:8.2f} ms')
+
+    path = write_results('signup', results, args.output)
+    print(f'Results written to {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Compare the read and write throughput of the SQLite profiles under concurrency.
+
+    python -m benchmarks.sqlite_concurrency [--readers 8] [--writers 2] [--duration 10]
+
+Each profile of SQLITE_PROFILES runs in its own process on a file database: reader
+threads load feed pages while writer threads create tickets. Completed operations
+and "database is locked" failures are counted for each side.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from . import benchmark_database, write_results
+
+
+def run_profile(readers, writers, duration, users):
+    """
+    Run the workload with the profile selected by DATABASE_PROFILE.
+    :return: a dict with the operations per second and failures of each side.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        with benchmark_database(os.path.join(directory, 'benchmark.sqlite3')) as connection:
+            from django.conf import settings
+            from django.db import OperationalError
+
+            from blog import dataset, feed, models
+
+            created = dataset.generate(users=users, tickets=users * 20, reviews=users * 10)
+            user_ids = [user.id for user in created]
+            users_by_id = {user.id: user for user in created}
+            counts = {'reads': 0, 'writes': 0, 'read_errors': 0, 'write_errors': 0}
+            lock = threading.Lock()
+            deadline = time.perf_counter() + duration
+
+            def work(kind):
+                rng = random.Random(threading.get_ident())
+                done = errors = 0
+                try:
+                    while time.perf_counter() < deadline:
+                        user = users_by_id[rng.choice(user_ids)]
+                        try:
+                            if kind == 'reads':
+                                feed.get_feed_page(user)
+                            else:
+                                models.Ticket.objects.create(title='Concurrence', user=user)
+                            done += 1
+                        except OperationalError:
+                            errors += 1
+                finally:
+                    connection.close()
+                with lock:
+                    counts[kind] += done
+                    counts[f'{kind[:-1]}_errors'] += errors
+
+            threads = [threading.Thread(target=work, args=('reads',)) for _ in range(readers)]
+            threads += [threading.Thread(target=work, args=('writes',)) for _ in range(writers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            profile = settings.DATABASE_PROFILE
+
+    return {
+        'profile': profile,
+        'reads_per_second': round(counts['reads'] / duration, 1),
+        'writes_per_second': round(counts['writes'] / duration, 1),
+        'read_errors': counts['read_errors'],
+        'write_errors': counts['write_errors'],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=10, help="Duration of each run, in seconds.")
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--profiles', nargs='+', default=['default', 'tuned'])
+    parser.add_argument('--output', help="JSON file to write, benchmarks/results/sqlite_concurrency.json by default.")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_profile(args.readers, args.writers, args.duration, args.users)))
+        return
+
+    # Connection options are read once per process, so each profile gets its own.
+    results = {'parameters': vars(args), 'profiles': {}}
+    for profile in args.profiles:
+        command = [sys.executable, '-m', 'benchmarks.sqlite_concurrency', '--worker',
+                   '--readers', str(args.readers), '--writers', str(args.writers),
+                   '--duration', str(args.duration), '--users', str(args.users)]
+        output = subprocess.run(command, env={**os.environ, 'DATABASE_PROFILE': profile},
+                                capture_output=True, text=True, check=True).stdout
+        result = results['profiles'][profile] = json.loads(output.strip().splitlines()[-1])
+        print(f'{profile:8} {result["reads_per_second"]:9.1f} reads/s {result["writes_per_second"]:8.1f} writes/s'
+              f'  {result["read_errors"]} read errors  {result["write_errors"]} write errors')
+
+    path = write_results('sqlite_concurrency', results, args.output)
+    print(f'Results written to {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Benchmark the main views on a synthetic community.
+
+    python -m benchmarks.views [--users 1000] [--tickets 10000] [--iterations 50]
+    python -m benchmarks.views --compare benchmarks/results/views-<old commit>.json
+
+The dataset is generated in a throwaway database, then each view is requested
+through the test client. Latency percentiles, query counts and peak memory are
+reported, and stored as JSON named after the current commit so runs can be
+compared between commits.
+"""
+import argparse
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+from . import benchmark_database, heaviest_user, write_results
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def measure(client, request, iterations):
+    """
+    Run a request several times and summarize its cost.
+    :param client: logged-in test client.
+    :param request: function sending the request with the client, given the iteration index.
+    :param iterations: number of timed runs.
+    :return: a dict with the latency percentiles, query count and peak memory.
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    latencies, queries = [], []
+    # The query log is bounded: once full after generating the dataset, no query would be counted.
+    connection.queries_log.clear()
+    for index in range(iterations):
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            response = request(client, index)
+            latencies.append((time.perf_counter() - start) * 1000)
+        queries.append(len(context.captured_queries))
+        if response.status_code >= 400:
+            raise RuntimeError(f'{response.status_code} response')
+
+    # Memory is traced in a separate run, as tracing slows the code down.
+    tracemalloc.start()
+    request(client, iterations)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p90_ms': round(percentile(latencies, 90), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'mean_ms': round(statistics.mean(latencies), 2),
+        'queries': max(queries),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def scenarios(user):
+    """
+    Requests of the benchmark, by name.
+    """
+    from django.urls import reverse
+
+    from blog import models
+
+    unreviewed = list(
+        models.Ticket.objects.exclude(user=user).filter(review__isnull=True)
+        .exclude(user__following__followed_user=user, user__following__is_blocked=True)
+        .values_list('id', flat=True)[:1000]
+    )
+
+    return {
+        'home': lambda client, index: client.get(reverse('home')),
+        'follow_users': lambda client, index: client.get(reverse('follow_users')),
+        'my_tickets': lambda client, index: client.get(reverse('my_tickets')),
+        'my_reviews': lambda client, index: client.get(reverse('my_reviews')),
+        'create_ticket': lambda client, index: client.post(
+            reverse('create_ticket'), {'title': f'Benchmark {index}', 'description': 'Description'}
+        ),
+        'create_review': lambda client, index: client.post(
+            reverse('create_review', args=[unreviewed[index % len(unreviewed)]]),
+            {'headline': 'Critique', 'body': 'Texte', 'rating': 3},
+        ),
+    }
+
+
+def compare(old, new):
+    for name, result in new['views'].items():
+        before = old['views'].get(name)
+        if before is None:
+            continue
+        change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0
+        print(f'{name:15} p50 {before["p50_ms"]:8.2f} -> {result["p50_ms"]:8.2f} ms ({change:+.0f}%)'
+              f'  queries {before["queries"]} -> {result["queries"]}'
+              f'  peak {before["peak_kib"]} -> {result["peak_kib"]} KiB')
+
+
+def main(argv=None):
+    import json
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--mean-follows', type=float, default=20)
+    parser.add_argument('--block-ratio', type=float, default=0.02)
+    parser.add_argument('--tickets', type=int, default=10_000)
+    parser.add_argument('--reviews', type=int, default=5_000)
+    parser.add_argument('--images', type=int, default=0)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--output', help="JSON file to write, benchmarks/results/views-<commit>.json by default.")
+    parser.add_argument('--compare', help="JSON results of a previous run to compare with.")
+    args = parser.parse_args(argv)
+
+    with benchmark_database():
+        from django.test import Client
+
+        from blog import dataset
+
+        users = dataset.generate(
+            users=args.users, mean_follows=args.mean_follows, block_ratio=args.block_ratio,
+            tickets=args.tickets, reviews=args.reviews, images=args.images,
+        )
+        user = heaviest_user(users)
+        client = Client()
+        client.force_login(user)
+
+        commit = current_commit()
+        results = {'commit': commit, 'parameters': vars(args), 'views': {}}
+        for name, request in scenarios(user).items():
+            results['views'][name] = result = measure(client, request, args.iterations)
+            print(f'{name:15} p50 {result["p50_ms"]:8.2f} ms  p99 {result["p99_ms"]:8.2f} ms'
+                  f'  {result["queries"]:3} queries  peak {result["peak_kib"]} KiB')
+
+    path = write_results(f'views-{commit}', results, args.output)
+    print(f'Results written to {path}')
+    if args.compare:
+        with open(args.compare) as file:
+            compare(json.load(file), results)
+
+
+if __name__ == '__main__':
+    main()
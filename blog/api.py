@@ -0,0 +1,253 @@
+"""
+Read-only JSON API of the feed, the posts of the user and their follow lists.
+
+Every list is paginated with an opaque cursor, and accepts a 'fields' parameter
+listing the fields of the posts to return. Responses carry a weak ETag computed
+without touching the database, so polling clients mostly get a 304 response.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.views.decorators.http import condition, require_safe
+
+from . import feed, feed_cache, graph, models
+from .views import mark_reviews
+
+User = get_user_model()
+
+TICKET_FIELDS = ('user', 'title', 'description', 'image', 'review_title', 'review_comment', 'review_rating',
+                 'has_review', 'time_created', 'updated_at')
+REVIEW_FIELDS = ('user', 'ticket', 'headline', 'body', 'rating', 'is_response', 'time_created', 'updated_at')
+RELATIONS = ('following', 'followers', 'blocked')
+
+
+class InvalidParameter(Exception):
+    pass
+
+
+def api_view(view):
+    """
+    Decorate an API view: the user must be logged in, and invalid parameters are
+    answered with a 400 response.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': "Authentification requise"}, status=401)
+        try:
+            return view(request, *args, **kwargs)
+        except InvalidParameter as error:
+            return JsonResponse({'error': str(error)}, status=400)
+    return wrapper
+
+
+def weak_etag(*parts) -> str:
+    """
+    Build a weak ETag from the state of the data and the full path of the request,
+    so that each page and each set of fields has its own tag.
+    """
+    digest = hashlib.blake2b(':'.join(str(part) for part in parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def posts_etag(request: HttpRequest, *args, **kwargs):
+    """
+    ETag of a list of posts, from the version of the cached feed of the user, which
+    changes whenever a post of the feed, including one of their own posts, is written.
+    The login is checked by api_view beforehand.
+    """
+    return weak_etag(request.user.id, feed_cache.get_version(request.user.id), request.get_full_path())
+
+
+def follows_etag(request: HttpRequest, relation: str):
+    """
+    ETag of a follow list, from the cached follow graph of the user.
+    """
+    if relation not in RELATIONS:
+        return None
+    ids = sorted(relation_ids(graph.get_adjacency(request.user.id), relation))
+    return weak_etag(request.user.id, ids, request.get_full_path())
+
+
+def relation_ids(adjacency, relation: str):
+    """
+    IDs of the users of a follow list, the blocked followers being listed as blocked only.
+    """
+    ids = getattr(adjacency, relation)
+    return ids - adjacency.blocked if relation == 'followers' else ids
+
+
+def requested_fields(request: HttpRequest, available) -> set:
+    """
+    Read the fields requested by the 'fields' parameter, every field by default.
+    :param request: HTTP request object.
+    :param available: names of the fields which may be requested.
+    :return: the set of requested field names.
+    """
+    if 'fields' not in request.GET:
+        return set(available)
+    fields = {field.strip() for field in request.GET['fields'].split(',') if field.strip()}
+    unknown = fields - set(available)
+    if unknown:
+        raise InvalidParameter(f"Champs inconnus : {', '.join(sorted(unknown))}")
+    return fields
+
+
+def requested_cursor(request: HttpRequest, kind=None):
+    """
+    Decode the 'cursor' parameter of a list of posts.
+    :param request: HTTP request object.
+    :param kind: the kind of posts of the list, None for the feed.
+    :return: a decoded cursor, or None for the first page.
+    """
+    if not request.GET.get('cursor'):
+        return None
+    cursor = feed.decode_cursor(request.GET['cursor'])
+    if cursor is None or (kind is not None and cursor[1] != kind):
+        raise InvalidParameter("Curseur invalide")
+    return cursor
+
+
+def serialize_user(user) -> dict:
+    return {'id': user.id, 'username': user.username}
+
+
+def serialize_ticket(ticket, fields) -> dict:
+    """
+    Serialize a ticket with the requested fields.
+    :param ticket: the Ticket instance, with its user loaded.
+    :param fields: names of the fields to include, unknown names being ignored.
+    :return: a JSON-serializable dict.
+    """
+    data = {'kind': feed.TICKET, 'id': ticket.id}
+    for field in TICKET_FIELDS:
+        if field not in fields:
+            continue
+        if field == 'user':
+            data['user'] = serialize_user(ticket.user)
+        elif field == 'image':
+            data['image'] = ticket.image_variants if ticket.image and ticket.image_ready else None
+        else:
+            data[field] = getattr(ticket, field)
+    return data
+
+
+def serialize_review(review, fields) -> dict:
+    """
+    Serialize a review with the requested fields. The reviewed ticket is serialized
+    with the requested fields which apply to tickets.
+    :param review: the Review instance, with its user and ticket loaded.
+    :param fields: names of the fields to include.
+    :return: a JSON-serializable dict.
+    """
+    data = {'kind': feed.REVIEW, 'id': review.id}
+    for field in REVIEW_FIELDS:
+        if field not in fields:
+            continue
+        if field == 'user':
+            data['user'] = serialize_user(review.user)
+        elif field == 'ticket':
+            data['ticket'] = serialize_ticket(review.ticket, fields)
+        elif field == 'is_response':
+            data['is_response'] = getattr(review, 'is_response', False)
+        else:
+            data[field] = getattr(review, field)
+    return data
+
+
+def serialize_post(post, fields) -> dict:
+    if isinstance(post, models.Review):
+        return serialize_review(post, fields)
+    return serialize_ticket(post, fields)
+
+
+def own_posts_page(request: HttpRequest, model, kind: str, available, serialize, related):
+    """
+    List one page of the posts of one kind written by the user, newest first.
+    The related objects serialized with the posts are loaded in the same query.
+    """
+    fields = requested_fields(request, available)
+    cursor = requested_cursor(request, kind)
+    posts = model.objects.filter(user=request.user).select_related(*related)
+    if cursor is not None:
+        posts = posts.filter(feed.after_cursor(kind, cursor))
+    posts = list(posts.order_by('-time_created', '-id')[:settings.FEED_PAGE_SIZE + 1])
+
+    next_cursor = None
+    if len(posts) > settings.FEED_PAGE_SIZE:
+        posts = posts[:settings.FEED_PAGE_SIZE]
+        next_cursor = feed.encode_cursor(posts[-1].time_created, kind, posts[-1].id)
+    return JsonResponse({'results': [serialize(post, fields) for post in posts], 'next_cursor': next_cursor})
+
+
+@api_view
+@require_safe
+@condition(etag_func=posts_etag)
+def feed_page(request: HttpRequest) -> HttpResponse:
+    """
+    List one page of the feed of the user, as the home page does.
+    :param request: HTTP request object, optionally carrying 'cursor' and 'fields' query parameters.
+    :return: JSON response with the posts of the page and the cursor of the next page.
+    """
+    fields = requested_fields(request, {*TICKET_FIELDS, *REVIEW_FIELDS})
+    posts, next_cursor = feed_cache.get_feed_page(request.user, requested_cursor(request))
+    mark_reviews(posts, request.user)
+    return JsonResponse({'results': [serialize_post(post, fields) for post in posts], 'next_cursor': next_cursor})
+
+
+@api_view
+@require_safe
+@condition(etag_func=posts_etag)
+def my_tickets(request: HttpRequest) -> HttpResponse:
+    """
+    List one page of the tickets created by the user.
+    :param request: HTTP request object, optionally carrying 'cursor' and 'fields' query parameters.
+    :return: JSON response with the tickets of the page and the cursor of the next page.
+    """
+    return own_posts_page(request, models.Ticket, feed.TICKET, TICKET_FIELDS, serialize_ticket, ['user'])
+
+
+@api_view
+@require_safe
+@condition(etag_func=posts_etag)
+def my_reviews(request: HttpRequest) -> HttpResponse:
+    """
+    List one page of the reviews created by the user, with their tickets.
+    :param request: HTTP request object, optionally carrying 'cursor' and 'fields' query parameters.
+    :return: JSON response with the reviews of the page and the cursor of the next page.
+    """
+    return own_posts_page(request, models.Review, feed.REVIEW, {*REVIEW_FIELDS, *TICKET_FIELDS}, serialize_review,
+                          ['user', 'ticket__user'])
+
+
+@api_view
+@require_safe
+@condition(etag_func=follows_etag)
+def follows(request: HttpRequest, relation: str) -> HttpResponse:
+    """
+    List one page of the users followed by the user, following them or blocked by them,
+    as the follow page does, by increasing ID.
+    :param request: HTTP request object, optionally carrying a 'cursor' query parameter,
+        the ID of the last user of the previous page.
+    :param relation: 'following', 'followers' or 'blocked'.
+    :return: JSON response with the users of the page and the cursor of the next page.
+    """
+    if relation not in RELATIONS:
+        return JsonResponse({'error': "Liste inconnue"}, status=404)
+    cursor = request.GET.get('cursor', '')
+    if cursor and not cursor.isdigit():
+        raise InvalidParameter("Curseur invalide")
+
+    ids = relation_ids(graph.get_adjacency(request.user.id), relation)
+    ids = sorted(user_id for user_id in ids if not cursor or user_id > int(cursor))
+
+    page = ids[:settings.FEED_PAGE_SIZE]
+    users = User.objects.in_bulk(page)
+    next_cursor = str(page[-1]) if len(ids) > len(page) else None
+    return JsonResponse({
+        'results': [serialize_user(users[user_id]) for user_id in page if user_id in users],
+        'next_cursor': next_cursor,
+    })
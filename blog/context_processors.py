@@ -0,0 +1,8 @@
+from django.conf import settings
+
+
+def post_cards(request) -> dict:
+    """
+    Lifetime of the cached cards of the posts, read by the cache tag of blog/post.html.
+    """
+    return {'post_card_timeout': settings.POST_CARD_TIMEOUT}
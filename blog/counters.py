@@ -0,0 +1,128 @@
+from collections import defaultdict
+from functools import partial, reduce
+from operator import or_
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from authentication import backends
+from . import models
+
+User = get_user_model()
+
+
+def review_counts(ticket_id: int, user_id: int, rating: int) -> dict:
+    """
+    Contribution of a review to the counters.
+    :return: the amounts added to the counters, by field, by (model, primary key).
+    """
+    return {
+        (models.Ticket, ticket_id): {'review_count': 1},
+        (User, user_id): {'review_count': 1, 'rating_sum': rating},
+    }
+
+
+def follow_counts(user_id: int, followed_id: int, is_blocked: bool) -> dict:
+    """
+    Contribution of a follow relation to the counters. A block counts for nothing.
+    :return: the amounts added to the counters, by field, by (model, primary key).
+    """
+    if is_blocked:
+        return {}
+    return {
+        (User, user_id): {'following_count': 1},
+        (User, followed_id): {'follower_count': 1},
+    }
+
+
+def combine(contributions) -> dict:
+    """
+    Sum several contributions to the counters into one.
+    """
+    total = defaultdict(lambda: defaultdict(int))
+    for counts in contributions:
+        for target, amounts in counts.items():
+            for field, amount in amounts.items():
+                total[target][field] += amount
+    return total
+
+
+def apply(added=None, removed=None):
+    """
+    Update the counters in the database, by the difference between two contributions.
+    Rows are updated with relative UPDATE queries, so concurrent writes never overwrite each other.
+    :param added: contribution of the row written, None if it was deleted.
+    :param removed: contribution of the row before the write, None if it was created.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for sign, counts in ((1, added or {}), (-1, removed or {})):
+        for target, amounts in counts.items():
+            for field, amount in amounts.items():
+                deltas[target][field] += sign * amount
+
+    # Rows changed by the same amounts are updated together, so a bulk write costs one query per kind of change.
+    rows = defaultdict(list)
+    for (model, pk), amounts in deltas.items():
+        changes = tuple(sorted((field, amount) for field, amount in amounts.items() if amount))
+        if changes:
+            rows[model, changes].append(pk)
+    for (model, changes), pks in rows.items():
+        model.objects.filter(pk__in=pks).update(**{field: F(field) + amount for field, amount in changes})
+        if model is User:
+            transaction.on_commit(partial(backends.invalidate, pks))
+
+
+def counted(model, field: str, **filters) -> Coalesce:
+    """
+    Count, in a subquery, the rows of a model whose field points to the outer row.
+    """
+    rows = model.objects.filter(**{field: OuterRef('pk')}, **filters).order_by().values(field)
+    return Coalesce(Subquery(rows.annotate(total=Count('*')).values('total')), 0)
+
+
+def summed(model, field: str, column: str) -> Coalesce:
+    """
+    Sum, in a subquery, a column of the rows of a model whose field points to the outer row.
+    """
+    rows = model.objects.filter(**{field: OuterRef('pk')}).order_by().values(field)
+    return Coalesce(Subquery(rows.annotate(total=Sum(column)).values('total')), 0)
+
+
+def actual_counters():
+    """
+    Expressions computing the true value of each counter, by model.
+    """
+    return {
+        models.Ticket: {
+            'review_count': counted(models.Review, 'ticket'),
+        },
+        User: {
+            'follower_count': counted(models.UserFollows, 'followed_user', is_blocked=False),
+            'following_count': counted(models.UserFollows, 'user', is_blocked=False),
+            'review_count': counted(models.Review, 'user'),
+            'rating_sum': summed(models.Review, 'user', 'rating'),
+        },
+    }
+
+
+def repair(user_ids=None, dry_run=False) -> dict:
+    """
+    Find the counters which drifted from the rows they count, and recompute them.
+    :param user_ids: IDs of the users whose counters and tickets are checked, every user by default.
+    :param dry_run: only count the drifted rows, without repairing them.
+    :return: the number of drifted rows, by model label.
+    """
+    results = {}
+    with transaction.atomic():
+        for model, counters in actual_counters().items():
+            rows = model.objects.all()
+            if user_ids is not None:
+                rows = rows.filter(**{'pk__in' if model is User else 'user__in': user_ids})
+            drifted = rows.filter(reduce(or_, (~Q(**{field: actual}) for field, actual in counters.items())))
+            results[model._meta.label] = drifted.count() if dry_run else drifted.update(**counters)
+        if not dry_run:
+            checked = user_ids if user_ids is not None else User.objects.values_list('pk', flat=True)
+            transaction.on_commit(partial(backends.invalidate, checked))
+    return results
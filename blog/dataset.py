@@ -0,0 +1,142 @@
+import random
+from datetime import timedelta
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image
+
+from . import counters, models
+from .storage import ticket_image_storage
+
+User = get_user_model()
+
+PASSWORD = 'Synthetic1!'
+BATCH_SIZE = 1000
+
+# Vocabulary of the generated texts, drawn with a power law so that some words are
+# common and others rare, as in real texts searched by the full-text index.
+WORDS = (
+    'livre roman auteur histoire personnage lecture chapitre intrigue fin style écriture page '
+    'héros héroïne amour guerre voyage enfance famille mystère enquête crime policier fantastique '
+    'science-fiction poésie essai biographie théâtre nouvelle conte jeunesse classique moderne '
+    'passionnant ennuyeux émouvant drôle sombre lumineux lent rapide captivant décevant magnifique '
+    'surprenant original banal profond léger dense touchant brillant inoubliable recommandé '
+    'traduction édition couverture univers monde ville campagne mer montagne forêt nuit hiver '
+    'été souvenirs secrets lettres journal mémoire révolution société liberté solitude destin'
+).split()
+
+
+def words(rng: random.Random, weights, count: int) -> str:
+    return ' '.join(rng.choices(WORDS, weights, k=count))
+
+
+def power_law_weights(count: int, exponent: float, rng: random.Random):
+    """
+    Weights following a power law (Zipf), shuffled so popularity does not follow the IDs.
+    """
+    weights = [1 / (rank + 1) ** exponent for rank in range(count)]
+    rng.shuffle(weights)
+    return weights
+
+
+def draw_images(count: int, rng: random.Random):
+    """
+    Store count distinct generated images.
+    :return: the list of their names in the ticket image storage.
+    """
+    names = []
+    for index in range(count):
+        content = BytesIO()
+        color = tuple(rng.randrange(256) for _ in range(3))
+        Image.new('RGB', (rng.randint(300, 1200), rng.randint(300, 1200)), color).save(content, 'JPEG')
+        names.append(ticket_image_storage.save(f'synthetic{index}.jpg', ContentFile(content.getvalue())))
+    return names
+
+
+def generate(users=1000, mean_follows=20, exponent=1.1, block_ratio=0.02, tickets=10_000, reviews=5_000,
+             images=0, days=365, prefix='synth', seed=0):
+    """
+    Fill the database with a synthetic community.
+    Follows go preferentially to popular users and posting activity is skewed, both
+    following a power law, as in real social graphs.
+    :param users: number of users to create.
+    :param mean_follows: average number of users followed by a user.
+    :param exponent: exponent of the power laws of popularity and activity.
+    :param block_ratio: share of follow relations that are blocks.
+    :param tickets: number of tickets to create.
+    :param reviews: number of reviews to create, each on a distinct ticket.
+    :param images: number of distinct images spread over the tickets.
+    :param days: period over which the posts are spread, up to now.
+    :param prefix: prefix of the usernames, which are <prefix><index>.
+    :param seed: seed of the random generator, so that runs are comparable.
+    :return: the list of created users, whose password is PASSWORD.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    password = make_password(PASSWORD)
+
+    created = User.objects.bulk_create(
+        (User(username=f'{prefix}{index}', password=password) for index in range(users)),
+        batch_size=BATCH_SIZE,
+    )
+    user_ids = [user.id for user in created]
+    popularity = power_law_weights(users, exponent, rng)
+    activity = power_law_weights(users, exponent, rng)
+
+    follows = []
+    followers = {user_id: [] for user_id in user_ids}
+    for user_id in user_ids:
+        # A Pareto draw of shape 1.5 averages 3, scaled to the requested mean.
+        wanted = min(users - 1, int(mean_follows * rng.paretovariate(1.5) / 3))
+        followed = set(rng.choices(user_ids, popularity, k=wanted)) - {user_id}
+        for followed_id in followed:
+            is_blocked = rng.random() < block_ratio
+            follows.append(models.UserFollows(user_id=user_id, followed_user_id=followed_id, is_blocked=is_blocked))
+            if not is_blocked:
+                followers[followed_id].append(user_id)
+    models.UserFollows.objects.bulk_create(follows, batch_size=BATCH_SIZE)
+
+    image_names = draw_images(images, rng)
+    vocabulary = power_law_weights(len(WORDS), exponent, rng)
+    ticket_objects = models.Ticket.objects.bulk_create(
+        (models.Ticket(
+            title=f'Billet {index} {words(rng, vocabulary, 3)}',
+            description=words(rng, vocabulary, rng.randint(5, 80)),
+            user_id=author_id,
+            image=rng.choice(image_names) if image_names and rng.random() < 0.5 else None,
+        ) for index, author_id in enumerate(rng.choices(user_ids, activity, k=tickets))),
+        batch_size=BATCH_SIZE,
+    )
+    for ticket in ticket_objects:
+        ticket.time_created = now - timedelta(seconds=rng.uniform(0, days * 86400))
+    models.Ticket.objects.bulk_update(ticket_objects, ['time_created'], batch_size=BATCH_SIZE)
+
+    review_objects, review_times = [], []
+    for ticket in rng.sample(ticket_objects, min(reviews, len(ticket_objects))):
+        candidates = followers[ticket.user_id]
+        if candidates and rng.random() < 0.8:
+            reviewer_id = rng.choice(candidates)
+        else:
+            reviewer_id = ticket.user_id
+        review_objects.append(models.Review(
+            ticket=ticket, user_id=reviewer_id, rating=rng.randint(0, 5), headline=f'Critique {ticket.title}',
+            body=words(rng, vocabulary, rng.randint(5, 150)),
+        ))
+        review_times.append(min(ticket.time_created + timedelta(seconds=rng.uniform(0, 86400)), now))
+    models.Review.objects.bulk_create(review_objects, batch_size=BATCH_SIZE)
+    for review, time_created in zip(review_objects, review_times):
+        review.time_created = time_created
+    models.Review.objects.bulk_update(review_objects, ['time_created'], batch_size=BATCH_SIZE)
+
+    for name in image_names:
+        ticket = models.Ticket.objects.filter(image=name).first()
+        if ticket is not None:
+            ticket.generate_image_variants()
+
+    # Bulk inserts bypass the signals maintaining the counters.
+    counters.repair(user_ids)
+
+    return created
@@ -0,0 +1,169 @@
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db.models import CharField, Exists, OuterRef, Q, Value
+
+from . import graph, models
+
+TICKET = 'ticket'
+REVIEW = 'review'
+
+
+def encode_cursor(time_created: datetime, kind: str, post_id: int) -> str:
+    """
+    Build the opaque cursor pointing just after a feed post.
+    :param time_created: creation time of the last post of the page.
+    :param kind: type of the last post ('ticket' or 'review').
+    :param post_id: ID of the last post of the page.
+    :return: the cursor as a string usable in a query string.
+    """
+    timestamp = int(time_created.timestamp() * 1_000_000)
+    return f'{timestamp}.{kind}.{post_id}'
+
+
+def decode_cursor(cursor: str):
+    """
+    Parse a cursor built by encode_cursor.
+    :param cursor: the cursor received from the client.
+    :return: a (time_created, kind, post_id) tuple, or None if the cursor is invalid.
+    """
+    try:
+        timestamp, kind, post_id = cursor.split('.')
+        time_created = datetime.fromtimestamp(int(timestamp) / 1_000_000, tz=timezone.utc)
+        post_id = int(post_id)
+    except (AttributeError, ValueError, OverflowError, OSError):
+        return None
+    if kind not in (TICKET, REVIEW):
+        return None
+    return time_created, kind, post_id
+
+
+def after_cursor(kind: str, cursor) -> Q:
+    """
+    Keyset condition selecting the posts of one kind that come after the cursor.
+    The feed is ordered by time_created descending, then kind, then id descending.
+    :param kind: the kind of posts the condition is applied to.
+    :param cursor: a decoded cursor.
+    :return: the filter to apply to the queryset of that kind.
+    """
+    time_created, cursor_kind, post_id = cursor
+    if kind > cursor_kind:
+        return Q(time_created__lte=time_created)
+    if kind < cursor_kind:
+        return Q(time_created__lt=time_created)
+    return Q(time_created__lt=time_created) | Q(time_created=time_created, id__lt=post_id)
+
+
+def feed_querysets(user):
+    """
+    Build the querysets of the tickets and reviews visible in the feed of a user.
+    The followed and blocked users are read from the follow graph, not joined in SQL.
+    :param user: the user whose feed is built.
+    :return: a (tickets, reviews) tuple of unordered querysets.
+    """
+    adjacency = graph.get_adjacency(user.id)
+    authors = sorted(adjacency.following | {user.id})
+
+    tickets = models.Ticket.objects.filter(user_id__in=authors)
+
+    reviews = models.Review.objects.filter(
+        Q(user_id__in=authors) |
+        Q(ticket__in=models.Ticket.objects.filter(user=user).values('id'))
+    )
+    if adjacency.blocked:
+        reviews = reviews.exclude(user_id__in=sorted(adjacency.blocked))
+
+    # A ticket answered by its own author is shown through that review only.
+    tickets = tickets.exclude(
+        Exists(models.Review.objects.filter(ticket=OuterRef('pk'), user=OuterRef('user')))
+    )
+
+    return tickets, reviews
+
+
+def audience(author_id, extra_ids=()):
+    """
+    Find the users who see the posts of an author in their feed.
+    :param author_id: ID of the author of the post.
+    :param extra_ids: IDs of other users entitled to see the post, such as the author of a reviewed ticket.
+    :return: the set of IDs of the users whose timeline holds the post.
+    """
+    adjacency = graph.get_adjacency(author_id)
+    return ({author_id, *extra_ids} | adjacency.followers) - adjacency.blocked_by
+
+
+def feed_rows(user, cursor=None):
+    """
+    Merge the tickets and reviews of the feed of a user in a single union query.
+    :param user: the user whose feed is built.
+    :param cursor: a decoded cursor, or None to start from the newest post.
+    :return: a queryset of (id, time_created, kind) tuples ordered as the feed.
+    """
+    tickets, reviews = feed_querysets(user)
+
+    if cursor is not None:
+        tickets = tickets.filter(after_cursor(TICKET, cursor))
+        reviews = reviews.filter(after_cursor(REVIEW, cursor))
+
+    ticket_rows = tickets.order_by().annotate(
+        kind=Value(TICKET, output_field=CharField())
+    ).values_list('id', 'time_created', 'kind')
+    review_rows = reviews.order_by().annotate(
+        kind=Value(REVIEW, output_field=CharField())
+    ).values_list('id', 'time_created', 'kind')
+
+    return ticket_rows.union(review_rows, all=True).order_by('-time_created', 'kind', '-id')
+
+
+def get_feed_page(user, cursor=None, page_size=None):
+    """
+    Load one page of the feed of a user.
+    Tickets and reviews are merged and ordered by the database in a single union
+    query, so only the rows of the requested page are ever loaded.
+    :param user: the user whose feed is displayed.
+    :param cursor: a decoded cursor, or None for the first page.
+    :param page_size: number of posts per page, FEED_PAGE_SIZE by default.
+    :return: a (posts, next_cursor) tuple, next_cursor being None on the last page.
+    """
+    page_size = page_size or settings.FEED_PAGE_SIZE
+    rows = list(feed_rows(user, cursor)[:page_size + 1])
+    return paginate(rows, page_size)
+
+
+def paginate(rows, page_size):
+    """
+    Turn the rows fetched for a page into its posts and the cursor of the next page.
+    :param rows: up to page_size + 1 ordered (id, time_created, kind) tuples.
+    :param page_size: number of posts per page.
+    :return: a (posts, next_cursor) tuple, next_cursor being None on the last page.
+    """
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+
+    posts = load_posts([(kind, post_id) for post_id, _, kind in rows])
+
+    next_cursor = None
+    if has_next:
+        last_id, last_time, last_kind = rows[-1]
+        next_cursor = encode_cursor(last_time, last_kind, last_id)
+
+    return posts, next_cursor
+
+
+def load_posts(keys):
+    """
+    Load the tickets and reviews of a page, keeping the order of the keys.
+    Authors and reviewed tickets are fetched along with the posts, and whether a ticket
+    has a review is a column of its own, so rendering the page triggers no further query.
+    :param keys: ordered list of (kind, post_id) tuples.
+    :return: the ordered list of Ticket and Review instances.
+    """
+    ticket_ids = [post_id for kind, post_id in keys if kind == TICKET]
+    review_ids = [post_id for kind, post_id in keys if kind == REVIEW]
+
+    loaded = {
+        TICKET: models.Ticket.objects.select_related('user').in_bulk(ticket_ids),
+        REVIEW: models.Review.objects.select_related('user', 'ticket__user').in_bulk(review_ids),
+    }
+
+    return [loaded[kind][post_id] for kind, post_id in keys if post_id in loaded[kind]]
@@ -0,0 +1,97 @@
+import time
+from collections import Counter
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import feed, timeline
+
+STATS = ('hits', 'misses', 'invalidations')
+
+# The counters are kept in the process: in the cache, they would be lost whenever it
+# culls entries, and shared by the tests.
+_stats = Counter()
+_stats_lock = Lock()
+
+
+def version_key(user_id: int) -> str:
+    return f'feed:version:{user_id}'
+
+
+def count(name: str, amount: int = 1):
+    """
+    Increment one of the hit/miss/invalidation counters of the feed cache.
+    """
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def get_stats() -> dict:
+    """
+    Read the counters of the feed cache in the current process.
+    :return: a dict with the number of hits, misses and invalidated feed versions.
+    """
+    with _stats_lock:
+        return {name: _stats[name] for name in STATS}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def get_version(user_id: int) -> str:
+    """
+    Read the current version of the cached feed of a user.
+    A fresh version is never equal to a previous one, so a version lost by the cache
+    cannot bring an outdated entry back. Versions expire after FEED_VERSION_TIMEOUT,
+    which bounds how long a process whose cache missed an eviction serves an outdated feed.
+    """
+    key = version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        fresh = str(time.time_ns())
+        cache.add(key, fresh, settings.FEED_VERSION_TIMEOUT)
+        version = cache.get(key) or fresh
+    return version
+
+
+def invalidate(user_ids):
+    """
+    Evict the cached feeds of some users by dropping their version.
+    :param user_ids: IDs of the users whose feed changed.
+    """
+    keys = [version_key(user_id) for user_id in set(user_ids)]
+    if keys:
+        cache.delete_many(keys)
+        count('invalidations', len(keys))
+
+
+def get_feed_page(user, cursor=None, page_size=None):
+    """
+    Load one page of the feed of a user, going through the cache.
+    Only the ordered (id, time_created, kind) rows of the page are cached: the posts
+    themselves are always loaded fresh, so an edited post is shown as is.
+    :param user: the user whose feed is displayed.
+    :param cursor: a decoded cursor, or None for the first page.
+    :param page_size: number of posts per page, FEED_PAGE_SIZE by default.
+    :return: a (posts, next_cursor) tuple, next_cursor being None on the last page.
+    """
+    page_size = page_size or settings.FEED_PAGE_SIZE
+    position = feed.encode_cursor(*cursor) if cursor else 'first'
+    key = f'feed:page:{user.id}:{get_version(user.id)}:{page_size}:{position}'
+
+    rows = cache.get(key)
+    if rows is None:
+        count('misses')
+        if timeline.is_enabled():
+            rows = timeline.timeline_rows(user, cursor)
+        else:
+            rows = feed.feed_rows(user, cursor)
+        rows = list(rows[:page_size + 1])
+        cache.set(key, rows, settings.FEED_CACHE_TIMEOUT)
+    else:
+        count('hits')
+
+    return feed.paginate(rows, page_size)
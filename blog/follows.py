@@ -0,0 +1,126 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from . import counters, feed_cache, graph, models, timeline
+
+User = get_user_model()
+
+FOLLOW = 'follow'
+UNFOLLOW = 'unfollow'
+BLOCK = 'block'
+UNBLOCK = 'unblock'
+ACTIONS = (FOLLOW, UNFOLLOW, BLOCK, UNBLOCK)
+
+# State of a relation: absent, followed or blocked
+ABSENT, FOLLOWED, BLOCKED = None, False, True
+
+# Result of an action on one username: (status, new state), by action and current state.
+# A blocked user stays blocked until explicitly unblocked, and unblocking keeps following them.
+TRANSITIONS = {
+    FOLLOW: {
+        ABSENT: ('followed', FOLLOWED), FOLLOWED: ('already_followed', FOLLOWED), BLOCKED: ('still_blocked', BLOCKED),
+    },
+    UNFOLLOW: {
+        ABSENT: ('not_followed', ABSENT), FOLLOWED: ('unfollowed', ABSENT), BLOCKED: ('still_blocked', BLOCKED),
+    },
+    BLOCK: {
+        ABSENT: ('blocked', BLOCKED), FOLLOWED: ('blocked', BLOCKED), BLOCKED: ('already_blocked', BLOCKED),
+    },
+    UNBLOCK: {
+        ABSENT: ('not_blocked', ABSENT), FOLLOWED: ('not_blocked', FOLLOWED), BLOCKED: ('unblocked', FOLLOWED),
+    },
+}
+
+STATUS_MESSAGES = {
+    'followed': "Vous suivez maintenant",
+    'already_followed': "Vous suivez déjà",
+    'unfollowed': "Vous ne suivez plus",
+    'not_followed': "Vous ne suiviez pas",
+    'blocked': "Utilisateurs bloqués",
+    'already_blocked': "Utilisateurs déjà bloqués",
+    'still_blocked': "Utilisateurs bloqués, à débloquer d'abord",
+    'unblocked': "Utilisateurs débloqués",
+    'not_blocked': "Utilisateurs non bloqués",
+    'self': "Vous ne pouvez pas vous suivre vous-même",
+    'unknown': "Utilisateurs non trouvés",
+}
+
+
+def parse_usernames(text: str):
+    """
+    Split a list of usernames separated by commas, semicolons, spaces or new lines.
+    """
+    return [username for username in text.replace(',', ' ').replace(';', ' ').split() if username]
+
+
+def apply_changes(user, changes):
+    """
+    Apply follow, unfollow, block and unblock actions of a user in a single transaction,
+    with one query to find the users, one to read the relations and one per kind of write,
+    deletions going through QuerySet.delete.
+    Bulk creations and updates send no signals: the counters, follow graph, timeline and
+    cached feed of the user are refreshed here.
+    :param user: the user who follows or blocks.
+    :param changes: ordered list of (username, action) tuples, a later action on a username
+        applying to the result of the previous ones.
+    :return: the list of (username, status) tuples, in the order of the changes.
+    """
+    with transaction.atomic():
+        targets = User.objects.in_bulk({username for username, _ in changes}, field_name='username')
+        relations = {
+            relation.followed_user_id: relation
+            for relation in models.UserFollows.objects.select_for_update().filter(
+                user=user, followed_user__in=[target.id for target in targets.values()]
+            )
+        }
+        initial = {target_id: relation.is_blocked for target_id, relation in relations.items()}
+        states = dict(initial)
+
+        results = []
+        for username, action in changes:
+            target = targets.get(username)
+            if target is None:
+                results.append((username, 'unknown'))
+            elif target.id == user.id:
+                results.append((username, 'self'))
+            else:
+                status, states[target.id] = TRANSITIONS[action][states.get(target.id, ABSENT)]
+                results.append((username, status))
+
+        created, updated, deleted = [], [], []
+        added, removed = [], []
+        for target_id, state in states.items():
+            before = initial.get(target_id, ABSENT)
+            if state == before:
+                continue
+            if before is ABSENT:
+                created.append(models.UserFollows(user=user, followed_user_id=target_id, is_blocked=state))
+            elif state is ABSENT:
+                deleted.append(relations[target_id].id)
+            else:
+                relations[target_id].is_blocked = state
+                updated.append(relations[target_id])
+                removed.append(counters.follow_counts(user.id, target_id, before))
+                added.append(counters.follow_counts(user.id, target_id, state))
+
+        # Rows which do not exist yet cannot be locked: a relation created meanwhile by a
+        # concurrent request is left as is, and the counters of the created relations are
+        # recomputed from the rows rather than incremented, so it is not counted twice.
+        models.UserFollows.objects.bulk_create(created, ignore_conflicts=True)
+        models.UserFollows.objects.bulk_update(updated, ['is_blocked'])
+        counters.apply(counters.combine(added), counters.combine(removed))
+        if created:
+            counters.repair([user.id, *(relation.followed_user_id for relation in created)])
+        # Deleted relations send their signals, which also update their counters.
+        models.UserFollows.objects.filter(id__in=deleted).delete()
+
+        changed = [target_id for target_id, state in states.items() if state != initial.get(target_id, ABSENT)]
+        if changed:
+            transaction.on_commit(partial(graph.invalidate, [user.id, *changed]))
+            if timeline.is_enabled():
+                transaction.on_commit(partial(timeline.rebuild_timeline, user.id))
+            transaction.on_commit(partial(feed_cache.invalidate, [user.id]))
+
+    return results
@@ -1,7 +1,10 @@
 from django import forms
+from django.conf import settings
+from django.template.defaultfilters import filesizeformat
+from PIL import Image
 
 from authentication.models import User
-from . import models
+from . import follows, models
 
 
 class ReviewForm(forms.ModelForm):
@@ -15,10 +18,57 @@ class ReviewForm(forms.ModelForm):
         }
 
 
+class BoundedImageField(forms.ImageField):
+    """
+    Image field checking the size of the file, then the dimensions read from the
+    image header, before Pillow goes any further with the file. Only JPEG images are
+    decoded at a reduced scale: the other formats are decoded in full, so they are
+    held to the lower UPLOAD_MAX_PIXELS_UNREDUCED.
+    """
+
+    def to_python(self, data):
+        if data in self.empty_values:
+            return super().to_python(data)
+
+        if data.size > settings.UPLOAD_MAX_BYTES:
+            raise forms.ValidationError(
+                f"L'image ne doit pas dépasser {filesizeformat(settings.UPLOAD_MAX_BYTES)}.",
+                code='image_too_large',
+            )
+
+        def too_many_pixels(max_pixels):
+            return forms.ValidationError(
+                f"L'image ne doit pas dépasser {max_pixels // 1_000_000} mégapixels.",
+                code='image_too_many_pixels',
+            )
+
+        source = data.temporary_file_path() if hasattr(data, 'temporary_file_path') else data
+        try:
+            with Image.open(source) as image:
+                width, height = image.size
+                image_format = image.format
+        except Image.DecompressionBombError:
+            raise too_many_pixels(settings.UPLOAD_MAX_PIXELS)
+        except OSError:
+            width = height = 0
+            image_format = None
+        finally:
+            if hasattr(data, 'seek'):
+                data.seek(0)
+        max_pixels = settings.UPLOAD_MAX_PIXELS if image_format == 'JPEG' else settings.UPLOAD_MAX_PIXELS_UNREDUCED
+        if width * height > max_pixels:
+            raise too_many_pixels(max_pixels)
+
+        return super().to_python(data)
+
+
 class TicketForm(forms.ModelForm):
     class Meta:
         model = models.Ticket
         fields = ['title', 'description', 'image']
+        field_classes = {
+            'image': BoundedImageField,
+        }
         labels = {
             'title': 'Titre',
             'description': 'Description',
@@ -34,3 +84,28 @@ class FollowUserForm(forms.Form):
         if not User.objects.filter(username=username).exists():
             raise forms.ValidationError("! Cet utilisateur n'existe pas")
         return username
+
+
+class SearchForm(forms.Form):
+    q = forms.CharField(label="Rechercher", max_length=200, required=False)
+
+
+class BulkFollowForm(forms.Form):
+    action = forms.ChoiceField(label="Action", choices=[
+        (follows.FOLLOW, "Suivre"),
+        (follows.UNFOLLOW, "Ne plus suivre"),
+        (follows.BLOCK, "Bloquer"),
+        (follows.UNBLOCK, "Débloquer"),
+    ])
+    usernames = forms.CharField(
+        label="Noms d'utilisateurs, séparés par des virgules ou des retours à la ligne",
+        widget=forms.Textarea(attrs={'rows': 4}),
+    )
+
+    def clean_usernames(self):
+        usernames = follows.parse_usernames(self.cleaned_data.get('usernames', ''))
+        if not usernames:
+            raise forms.ValidationError("! Indiquez au moins un nom d'utilisateur")
+        if len(usernames) > settings.BULK_FOLLOW_MAX:
+            raise forms.ValidationError(f"! Pas plus de {settings.BULK_FOLLOW_MAX} utilisateurs à la fois")
+        return usernames
@@ -0,0 +1,75 @@
+from array import array
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from . import models
+
+
+class Adjacency(NamedTuple):
+    """
+    The follow relations of one user, as sets of user IDs.
+    """
+    following: frozenset
+    followers: frozenset
+    blocked: frozenset
+    blocked_by: frozenset
+
+
+def graph_key(user_id: int) -> str:
+    return f'graph:{user_id}'
+
+
+def pack(adjacency: Adjacency) -> tuple:
+    """
+    Turn an adjacency into sorted arrays of 64-bit integers, far smaller than pickled sets.
+    """
+    return tuple(array('q', sorted(ids)) for ids in adjacency)
+
+
+def unpack(packed: tuple) -> Adjacency:
+    return Adjacency(*(frozenset(ids) for ids in packed))
+
+
+def load_adjacency(user_id: int) -> Adjacency:
+    """
+    Read the follow relations of a user from the database, in a single query.
+    :param user_id: ID of the user.
+    :return: the adjacency of the user.
+    """
+    following, followers, blocked, blocked_by = set(), set(), set(), set()
+    relations = models.UserFollows.objects.filter(
+        Q(user_id=user_id) | Q(followed_user_id=user_id)
+    ).values_list('user_id', 'followed_user_id', 'is_blocked')
+    for follower_id, followed_id, is_blocked in relations:
+        if follower_id == user_id:
+            (blocked if is_blocked else following).add(followed_id)
+        else:
+            (blocked_by if is_blocked else followers).add(follower_id)
+    return Adjacency(frozenset(following), frozenset(followers), frozenset(blocked), frozenset(blocked_by))
+
+
+def get_adjacency(user_id: int) -> Adjacency:
+    """
+    Read the follow relations of a user, going through the cache.
+    :param user_id: ID of the user.
+    :return: the adjacency of the user.
+    """
+    packed = cache.get(graph_key(user_id))
+    if packed is not None:
+        return unpack(packed)
+    adjacency = load_adjacency(user_id)
+    cache.set(graph_key(user_id), pack(adjacency), settings.FOLLOW_GRAPH_TIMEOUT)
+    return adjacency
+
+
+def invalidate(user_ids):
+    """
+    Drop the cached adjacencies of some users once their relations changed, so they
+    are read again from the database. Dropping them instead of patching them in place
+    never loses a concurrent change.
+    :param user_ids: IDs of the users whose relations changed.
+    """
+    cache.delete_many([graph_key(user_id) for user_id in set(user_ids)])
@@ -0,0 +1,78 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+_executor = None
+_executor_lock = Lock()
+_pending = deque()
+
+
+def process_ticket_image(ticket_id: int):
+    """
+    Generate the variants of the image of a ticket and mark it as ready, evicting the
+    cached feeds showing it. The ticket is skipped if it was deleted, and left unmarked if its image was
+    replaced in the meantime, since the new image has its own job.
+    :param ticket_id: ID of the ticket whose image was uploaded.
+    """
+    from . import feed, feed_cache
+    from .models import Ticket
+
+    ticket = Ticket.objects.filter(id=ticket_id).first()
+    if ticket is None or not ticket.image:
+        return
+    ticket.generate_image_variants()
+    marked = Ticket.objects.filter(id=ticket_id, image=ticket.image.name).update(
+        image_ready=True, updated_at=timezone.now()
+    )
+    if marked:
+        feed_cache.invalidate(feed.audience(ticket.user_id))
+
+
+def _run_in_worker(ticket_id: int):
+    close_old_connections()
+    try:
+        process_ticket_image(ticket_id)
+    finally:
+        close_old_connections()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Return the pool of worker threads processing the images, created on first use.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_PROCESSING_WORKERS, thread_name_prefix='ticket-image'
+            )
+    return _executor
+
+
+def schedule(ticket_id: int):
+    """
+    Queue the processing of the image of a ticket, off the request.
+    With the 'queue' backend the job waits in a local queue until run_pending is
+    called, which stands in for an external task queue in tests and scripts.
+    :param ticket_id: ID of the ticket whose image was uploaded.
+    """
+    if settings.IMAGE_PROCESSING_BACKEND == 'queue':
+        _pending.append(ticket_id)
+    else:
+        get_executor().submit(_run_in_worker, ticket_id)
+
+
+def run_pending() -> int:
+    """
+    Process the jobs waiting in the local queue.
+    :return: the number of processed jobs.
+    """
+    processed = 0
+    while _pending:
+        process_ticket_image(_pending.popleft())
+        processed += 1
+    return processed
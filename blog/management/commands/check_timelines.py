@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import timeline
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Compare the materialized feed timelines with the query-based feed."
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*', help="Users to check, every user by default.")
+        parser.add_argument('--repair', action='store_true', help="Rebuild the timelines found inconsistent.")
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+
+        inconsistent = []
+        for user in users.iterator():
+            missing, unexpected = timeline.check_timeline(user)
+            if not missing and not unexpected:
+                continue
+            inconsistent.append(user.username)
+            self.stdout.write(
+                f"{user.username} : {len(missing)} entrées manquantes, {len(unexpected)} entrées en trop"
+            )
+            if options['repair']:
+                timeline.rebuild_timeline(user.id)
+
+        if inconsistent and not options['repair']:
+            raise CommandError(f"{len(inconsistent)} flux incohérents.")
+        self.stdout.write(self.style.SUCCESS("Flux cohérents."))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog import dataset, feed_cache, graph, search, timeline
+
+
+class Command(BaseCommand):
+    help = "Generate a synthetic community of users, follows, tickets, reviews and images."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--mean-follows', type=float, default=20,
+                            help="Average number of users followed by a user.")
+        parser.add_argument('--exponent', type=float, default=1.1,
+                            help="Exponent of the power laws of popularity and activity.")
+        parser.add_argument('--block-ratio', type=float, default=0.02,
+                            help="Share of follow relations that are blocks.")
+        parser.add_argument('--tickets', type=int, default=10_000)
+        parser.add_argument('--reviews', type=int, default=5_000)
+        parser.add_argument('--images', type=int, default=0, help="Number of distinct images to generate.")
+        parser.add_argument('--days', type=int, default=365, help="Period over which the posts are spread.")
+        parser.add_argument('--prefix', default='synth', help="Prefix of the generated usernames.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            users = dataset.generate(
+                users=options['users'], mean_follows=options['mean_follows'], exponent=options['exponent'],
+                block_ratio=options['block_ratio'], tickets=options['tickets'], reviews=options['reviews'],
+                images=options['images'], days=options['days'], prefix=options['prefix'], seed=options['seed'],
+            )
+
+        # Bulk inserts send no signals: the follow graph, search index, timelines and cached feeds
+        # are refreshed here.
+        user_ids = [user.id for user in users]
+        graph.invalidate(user_ids)
+        search.rebuild_index(user_ids)
+        if timeline.is_enabled():
+            for user_id in user_ids:
+                timeline.rebuild_timeline(user_id)
+        feed_cache.invalidate(user_ids)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(users)} utilisateurs générés, mot de passe : {dataset.PASSWORD}"
+        ))
@@ -0,0 +1,53 @@
+import csv
+import sys
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import follows
+
+
+class Command(BaseCommand):
+    help = ("Follow, unfollow, block or unblock the users listed in a CSV file on behalf of a user, "
+            "in a single transaction. The first column holds the username, an optional second "
+            "column the action, which defaults to --action.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help="The user who follows or blocks.")
+        parser.add_argument('path', help="CSV file to import, - to read the standard input.")
+        parser.add_argument('--action', choices=follows.ACTIONS, default=follows.FOLLOW,
+                            help="Action applied to the rows without one.")
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options['username'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"Utilisateur non trouvé : {options['username']}")
+
+        if options['path'] == '-':
+            changes = self.read_changes(sys.stdin, options['action'])
+        else:
+            with open(options['path'], newline='', encoding='utf-8') as file:
+                changes = self.read_changes(file, options['action'])
+
+        results = follows.apply_changes(user, changes)
+        for username, status in results:
+            self.stdout.write(f"{username} : {status}")
+        summary = ', '.join(f"{status} {count}" for status, count in Counter(status for _, status in results).items())
+        self.stdout.write(self.style.SUCCESS(f"{len(results)} ligne(s) importée(s) ({summary})."))
+
+    def read_changes(self, file, default_action):
+        """
+        Read the (username, action) changes of a CSV file, skipping empty rows and the header.
+        """
+        changes = []
+        for line, row in enumerate(csv.reader(file), start=1):
+            cells = [cell.strip() for cell in row]
+            if not cells or not cells[0] or (line == 1 and cells[0] == 'username'):
+                continue
+            action = cells[1] if len(cells) > 1 and cells[1] else default_action
+            if action not in follows.ACTIONS:
+                raise CommandError(f"Ligne {line} : action inconnue « {action} »")
+            changes.append((cells[0], action))
+        return changes
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from blog import images, models
+
+
+class Command(BaseCommand):
+    help = "Generate the missing variants of the ticket images, in this process."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Also check the images already marked as ready.")
+
+    def handle(self, *args, **options):
+        tickets = models.Ticket.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            tickets = tickets.filter(image_ready=False)
+
+        count = 0
+        for ticket_id in tickets.values_list('id', flat=True).iterator():
+            images.process_ticket_image(ticket_id)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"{count} images traitées."))
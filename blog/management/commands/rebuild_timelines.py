@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from blog import timeline
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized feed timelines from the tickets, reviews and follows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='*', help="Users to rebuild, every user by default.")
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+
+        total = 0
+        for user in users.iterator():
+            count = timeline.rebuild_timeline(user.id)
+            total += count
+            self.stdout.write(f"{user.username} : {count} entrées")
+
+        self.stdout.write(self.style.SUCCESS(f"{total} entrées reconstruites."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blog import counters
+
+
+class Command(BaseCommand):
+    help = "Recompute the review and follower counters, and repair those which drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report the drifted counters.")
+
+    def handle(self, *args, **options):
+        results = counters.repair(dry_run=options['dry_run'])
+        for label, count in results.items():
+            self.stdout.write(f"{label} : {count} ligne(s) {'à corriger' if options['dry_run'] else 'corrigée(s)'}")
+        self.stdout.write(self.style.SUCCESS("Compteurs vérifiés."))
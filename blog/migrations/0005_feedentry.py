@@ -0,0 +1,30 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_ticket_review_comment_ticket_review_rating_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=6)),
+                ('post_id', models.BigIntegerField()),
+                ('time_created', models.DateTimeField()),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', '-time_created', 'kind', '-post_id'], name='blog_feedentry_timeline'), models.Index(fields=['kind', 'post_id'], name='blog_feedentry_post')],
+                'unique_together': {('owner', 'kind', 'post_id')},
+            },
+        ),
+    ]
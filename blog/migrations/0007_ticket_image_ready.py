@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='image_ready',
+            field=models.BooleanField(default=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:15
+
+import blog.storage
+from django.db import migrations, models
+
+
+def mark_images_unprocessed(apps, schema_editor):
+    # Images uploaded before variants existed are shown again once
+    # `manage.py process_ticket_images` has generated their variants.
+    Ticket = apps.get_model('blog', 'Ticket')
+    Ticket.objects.exclude(image='').exclude(image__isnull=True).update(image_ready=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_ticket_image_ready'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ticket',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=blog.storage.get_ticket_image_storage, upload_to=''),
+        ),
+        migrations.RunPython(mark_images_unprocessed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,138 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:32
+
+import itertools
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+FTS5_SQL = [
+    """
+    CREATE VIRTUAL TABLE blog_searchentry_fts USING fts5(
+        document, content='blog_searchentry', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER blog_searchentry_fts_insert AFTER INSERT ON blog_searchentry BEGIN
+        INSERT INTO blog_searchentry_fts (rowid, document) VALUES (new.id, new.document);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_searchentry_fts_delete AFTER DELETE ON blog_searchentry BEGIN
+        INSERT INTO blog_searchentry_fts (blog_searchentry_fts, rowid, document) VALUES ('delete', old.id, old.document);
+    END
+    """,
+    """
+    CREATE TRIGGER blog_searchentry_fts_update AFTER UPDATE ON blog_searchentry BEGIN
+        INSERT INTO blog_searchentry_fts (blog_searchentry_fts, rowid, document) VALUES ('delete', old.id, old.document);
+        INSERT INTO blog_searchentry_fts (rowid, document) VALUES (new.id, new.document);
+    END
+    """,
+]
+
+
+def create_search_index(apps, schema_editor):
+    # Django knows nothing of the FTS5 table and its triggers: an operation rebuilding
+    # blog_searchentry on SQLite (such as altering a field) has to create the triggers again.
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in FTS5_SQL:
+            schema_editor.execute(statement)
+    elif schema_editor.connection.vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+
+        SearchEntry = apps.get_model('blog', 'SearchEntry')
+        schema_editor.add_index(SearchEntry, GinIndex(
+            SearchVector('document', config='french'), name='blog_searchentry_document'
+        ))
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE blog_searchentry_fts')
+
+
+# The analyzer of blog.search as of this migration, so that later changes to it, or the
+# database it is configured for, do not change what this migration writes.
+WORD = re.compile(r'\w+')
+ELISIONS = {'qu', 'jusqu', 'lorsqu', 'puisqu', 'quoiqu'}
+TICKET_FIELDS = ('title', 'description', 'review_title', 'review_comment')
+REVIEW_FIELDS = ('headline', 'body')
+
+
+def stem(word):
+    if len(word) > 3 and word.endswith('x'):
+        return word[:-3] + 'al' if word.endswith('aux') else word[:-1]
+    for ending in 'sreé':
+        if len(word) > 3 and word.endswith(ending):
+            word = word[:-1]
+    if len(word) > 2 and word[-1] == word[-2] and word[-1].isalpha():
+        word = word[:-1]
+    return word
+
+
+def unaccent(word):
+    return ''.join(char for char in unicodedata.normalize('NFKD', word) if not unicodedata.combining(char))
+
+
+def prepare(text):
+    return ' '.join(
+        unaccent(stem(word)) for word in WORD.findall(text.lower())
+        if len(word) > 1 and word not in ELISIONS
+    )
+
+
+def index_posts(apps, schema_editor):
+    # SQLite has no French stemmer: the text is analyzed here. PostgreSQL stems the raw text itself.
+    analyze = prepare if schema_editor.connection.vendor == 'sqlite' else str
+    database = schema_editor.connection.alias
+
+    SearchEntry = apps.get_model('blog', 'SearchEntry')
+    sources = [
+        ('ticket', apps.get_model('blog', 'Ticket').objects.using(database).values_list(
+            'time_created', 'id', 'user_id', 'user_id', *TICKET_FIELDS)),
+        ('review', apps.get_model('blog', 'Review').objects.using(database).values_list(
+            'time_created', 'id', 'user_id', 'ticket__user_id', *REVIEW_FIELDS)),
+    ]
+
+    def rows(kind, queryset):
+        for time_created, *values in queryset.iterator():
+            yield time_created, kind, *values
+
+    SearchEntry.objects.using(database).bulk_create((
+        SearchEntry(kind=kind, post_id=post_id, author_id=author_id, ticket_author_id=ticket_author_id,
+                    time_created=time_created, document=analyze('\n'.join(text for text in texts if text)))
+        for time_created, kind, post_id, author_id, ticket_author_id, *texts in itertools.chain(
+            *(rows(kind, queryset) for kind, queryset in sources)
+        )
+    ), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_ticket_image_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=6)),
+                ('post_id', models.BigIntegerField()),
+                ('time_created', models.DateTimeField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('ticket_author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('document', models.TextField()),
+            ],
+            options={
+                'unique_together': {('kind', 'post_id')},
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(index_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:31
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def compute_counters(apps, schema_editor):
+    Ticket = apps.get_model('blog', 'Ticket')
+    Review = apps.get_model('blog', 'Review')
+    UserFollows = apps.get_model('blog', 'UserFollows')
+    User = apps.get_model('authentication', 'User')
+
+    def aggregated(model, field, aggregate, **filters):
+        rows = model.objects.filter(**{field: OuterRef('pk')}, **filters).order_by().values(field)
+        return Coalesce(Subquery(rows.annotate(total=aggregate).values('total')), 0)
+
+    Ticket.objects.update(review_count=aggregated(Review, 'ticket', Count('*')))
+    User.objects.update(
+        follower_count=aggregated(UserFollows, 'followed_user', Count('*'), is_blocked=False),
+        following_count=aggregated(UserFollows, 'user', Count('*'), is_blocked=False),
+        review_count=aggregated(Review, 'user', Count('*')),
+        rating_sum=aggregated(Review, 'user', Sum('rating')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_counters'),
+        ('blog', '0009_searchentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(compute_counters, migrations.RunPython.noop),
+    ]
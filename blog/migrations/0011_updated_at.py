@@ -0,0 +1,33 @@
+# Generated by Django 5.1.3 on 2026-10-18 20:02
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_time_created(apps, schema_editor):
+    for name in ('Ticket', 'Review'):
+        apps.get_model('blog', name).objects.update(updated_at=F('time_created'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_time_created, migrations.RunPython.noop),
+    ]
@@ -1,33 +1,117 @@
+from functools import partial
+from io import BytesIO
+from pathlib import PurePosixPath
+
 from django.conf import settings
-from django.db import models
+from django.core.files.base import ContentFile
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 from PIL import Image
 
+from . import images
+from .storage import get_ticket_image_storage
+
 
 class Ticket(models.Model):
     title = models.CharField(max_length=128)
     description = models.TextField(max_length=2048, blank=True)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
-    image = models.ImageField(null=True, blank=True)
+    image = models.ImageField(null=True, blank=True, storage=get_ticket_image_storage)
+    image_ready = models.BooleanField(default=True)
     time_created = models.DateTimeField(auto_now_add=True)
+    # Set on every save, it versions the cached card of the post, see blog/post.html
+    updated_at = models.DateTimeField(auto_now=True)
     review_title = models.CharField(max_length=128, null=True, blank=True)
     review_comment = models.TextField(null=True, blank=True)
     review_rating = models.IntegerField(null=True, blank=True)
+    # Maintained on every write by blog.counters, see the repair_counters command
+    review_count = models.PositiveIntegerField(default=0)
+
+    # Variants generated for each image, by name: (maximum size, width announced in srcset)
+    IMAGE_VARIANTS = {
+        'feed': ((200, 200), 200),
+        'feed_2x': ((400, 400), 400),
+        'detail': ((800, 800), 800),
+    }
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-time_created'], name='blog_ticket_user_time'),
+        ]
+
+    def variant_name(self, variant: str) -> str:
+        """
+        Name of the stored file of an image variant, derived from the name of the image.
+        """
+        return f'variants/{PurePosixPath(self.image.name).with_suffix("")}/{variant}.webp'
+
+    def generate_image_variants(self):
+        """
+        Generate the WebP variants of the uploaded image that do not exist yet.
+        The original image is kept untouched, since other tickets may share it.
+        """
+        storage = self.image.storage
+        largest = max(size for size, _ in self.IMAGE_VARIANTS.values())
+        with storage.open(self.image.name) as original:
+            image = Image.open(original)
+            # JPEG images are decoded straight at a reduced scale. The others are decoded
+            # in full before being reduced to the largest variant, which is why the form
+            # holds them to the lower UPLOAD_MAX_PIXELS_UNREDUCED.
+            image.draft(image.mode, largest)
+            image.thumbnail(largest, reducing_gap=2.0)
+            image.load()
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
 
-    IMAGE_MAX_SIZE = (200, 200)
+        for variant, (size, _) in self.IMAGE_VARIANTS.items():
+            name = self.variant_name(variant)
+            if storage.exists(name):
+                continue
+            resized = image.copy()
+            resized.thumbnail(size)
+            content = BytesIO()
+            resized.save(content, 'WEBP', quality=80, method=4)
+            storage.save_derived(name, ContentFile(content.getvalue()))
 
-    def resize_image(self):
+    @property
+    def image_variants(self) -> dict:
         """
-        Resize the uploaded image to a predefined maximum size.
+        URLs of the variants of the image, by variant name.
         """
-        image = Image.open(self.image)
-        image.thumbnail(self.IMAGE_MAX_SIZE)
-        image.save(self.image.path)
+        return {variant: self.image.storage.url(self.variant_name(variant)) for variant in self.IMAGE_VARIANTS}
+
+    @property
+    def image_srcset(self) -> str:
+        """
+        The srcset attribute listing the variants of the image with their width.
+        """
+        urls = self.image_variants
+        return ', '.join(f'{urls[variant]} {width}w' for variant, (_, width) in self.IMAGE_VARIANTS.items())
+
+    @property
+    def has_review(self) -> bool:
+        return self.review_count > 0
+
+    @property
+    def card_key(self) -> str:
+        """
+        Key of the cached card of the ticket, changed whenever the ticket is saved.
+        """
+        return f'ticket:{self.id}:{self.updated_at.timestamp()}'
 
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        if self.image:
-            self.resize_image()
+        """
+        Save the ticket and, when a new image was uploaded, queue the generation of its
+        variants once the transaction is committed. The image is shown as a placeholder until then.
+        The ticket is saved in a transaction along with the search index, written by signals.
+        """
+        image_changed = bool(self.image) and not self.image._committed
+        if image_changed:
+            self.image_ready = False
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        if image_changed:
+            transaction.on_commit(partial(images.schedule, self.id))
 
     def __str__(self):
         return f'{self.title}'
@@ -40,6 +124,30 @@ class Review(models.Model):
     headline = models.CharField(max_length=128)
     body = models.TextField(max_length=8192, blank=True)
     time_created = models.DateTimeField(auto_now_add=True)
+    # Set on every save, it versions the cached card of the post, see blog/post.html
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-time_created'], name='blog_review_user_time'),
+            models.Index(fields=['ticket', 'user'], name='blog_review_ticket_user'),
+        ]
+
+    @property
+    def card_key(self) -> str:
+        """
+        Key of the cached card of the review, changed whenever the review or its ticket is saved.
+        The card of a review answering a ticket of the visitor differs, see blog.views.mark_reviews.
+        """
+        is_response = getattr(self, 'is_response', False)
+        return f'review:{self.id}:{self.updated_at.timestamp()}:{self.ticket.updated_at.timestamp()}:{is_response}'
+
+    def save(self, *args, **kwargs):
+        """
+        Save the review in a transaction along with the counters and the search index, written by signals.
+        """
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f'{self.headline}'
@@ -52,3 +160,54 @@ class UserFollows(models.Model):
 
     class Meta:
         unique_together = ('user', 'followed_user')
+        indexes = [
+            models.Index(fields=['user', 'is_blocked', 'followed_user'], name='blog_follows_user_blocked'),
+            models.Index(fields=['followed_user', 'is_blocked', 'user'], name='blog_follows_followed_blocked'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        Save the relation in a transaction along with the follower counters, written by signals.
+        """
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class FeedEntry(models.Model):
+    """
+    A post materialized in the timeline of a user by the fan-out-on-write engine.
+    """
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='feed_entries')
+    kind = models.CharField(max_length=6)
+    post_id = models.BigIntegerField()
+    time_created = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('owner', 'kind', 'post_id')
+        indexes = [
+            models.Index(fields=['owner', '-time_created', 'kind', '-post_id'], name='blog_feedentry_timeline'),
+            models.Index(fields=['kind', 'post_id'], name='blog_feedentry_post'),
+        ]
+
+
+class SearchEntry(models.Model):
+    """
+    The text of a ticket or a review in the full-text search index.
+    On SQLite, the FTS5 table blog_searchentry_fts is kept in sync with this one by
+    triggers, see the 0009_searchentry migration. On PostgreSQL, a GIN index covers
+    the French tsvector of the document.
+    The document is the last column, so filtering matched rows on the other columns
+    never reads the overflow pages of long texts.
+    """
+    kind = models.CharField(max_length=6)
+    post_id = models.BigIntegerField()
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    ticket_author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    time_created = models.DateTimeField()
+    document = models.TextField()
+
+    class Meta:
+        unique_together = ('kind', 'post_id')
+        indexes = [
+            models.Index(fields=['-time_created', 'kind', '-post_id'], name='blog_searchentry_time'),
+        ]
@@ -0,0 +1,168 @@
+"""
+Push of the new posts to the feeds open in a browser, with Server-Sent Events.
+
+Each open feed subscribes to a broker under the ID of its user. Once a post is
+committed, it is serialized once and published to the connected users of its
+audience, the users who blocked its author being left out as in the feed.
+The local broker only reaches the clients of its own process, which is enough for
+a single ASGI server and for tests. Several processes need a shared broker, with
+the same interface, set by PUSH_BROKER.
+"""
+import asyncio
+import json
+import threading
+from collections import deque
+from functools import cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+from . import feed
+
+# Sent to a client which fell too far behind, so it reloads its feed instead
+RESYNC = 'event: resync\ndata: {}\n\n'
+
+
+class Subscription:
+    """
+    The pending messages of one connected client. Messages are added from any thread,
+    and read from the event loop serving the client.
+    """
+
+    def __init__(self, user_id: int, loop: asyncio.AbstractEventLoop):
+        self.user_id = user_id
+        self.loop = loop
+        self.pending = deque()
+        self.ready = asyncio.Event()
+
+    def push(self, message: str):
+        """
+        Add a message for the client. When the client fell too far behind, its pending
+        messages are replaced by a request to reload the feed.
+        """
+        if len(self.pending) >= settings.PUSH_MAX_PENDING:
+            self.pending.clear()
+            message = RESYNC
+        self.pending.append(message)
+        self.loop.call_soon_threadsafe(self.ready.set)
+
+    async def receive(self, timeout: float):
+        """
+        Wait for messages.
+        :param timeout: maximum waiting time in seconds.
+        :return: the list of pending messages, empty if none came in time.
+        """
+        deadline = self.loop.time() + timeout
+        while not self.pending:
+            # The event is set on this loop after each message is added, so clearing it here never loses one.
+            self.ready.clear()
+            try:
+                await asyncio.wait_for(self.ready.wait(), deadline - self.loop.time())
+            except asyncio.TimeoutError:
+                return []
+        messages = []
+        while self.pending:
+            messages.append(self.pending.popleft())
+        return messages
+
+
+class LocalBroker:
+    """
+    Publish and subscribe within the current process.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = {}
+
+    def subscribe(self, user_id: int, loop: asyncio.AbstractEventLoop) -> Subscription:
+        subscription = Subscription(user_id, loop)
+        with self.lock:
+            self.subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.subscriptions.pop(subscription.user_id, None)
+
+    def connected(self, user_ids) -> set:
+        """
+        Keep the IDs of the users having at least one open subscription.
+        """
+        with self.lock:
+            return {user_id for user_id in user_ids if user_id in self.subscriptions}
+
+    def publish(self, user_ids, message: str):
+        """
+        Send a message to every subscription of some users.
+        :param user_ids: IDs of the recipients.
+        :param message: the formatted event.
+        """
+        with self.lock:
+            recipients = [subscription for user_id in user_ids for subscription in self.subscriptions.get(user_id, ())]
+        for subscription in recipients:
+            try:
+                subscription.push(message)
+            except RuntimeError:
+                # The event loop of the client is closed: the client is gone.
+                self.unsubscribe(subscription)
+
+
+@cache
+def get_broker():
+    return import_string(settings.PUSH_BROKER)()
+
+
+def format_event(event: str, data, event_id=None) -> str:
+    """
+    Format a Server-Sent Event, its data being encoded in JSON.
+    """
+    lines = [f'id: {event_id}'] if event_id else []
+    lines += [f'event: {event}', f'data: {json.dumps(data, cls=DjangoJSONEncoder)}']
+    return '\n'.join(lines) + '\n\n'
+
+
+def publish_post(kind: str, post_id: int, author_id: int, extra_ids=()):
+    """
+    Push a new post to the connected users who see it in their feed.
+    The post is only loaded if one of them is connected.
+    :param kind: type of the post ('ticket' or 'review').
+    :param post_id: ID of the post.
+    :param author_id: ID of the author of the post.
+    :param extra_ids: IDs of other users entitled to see the post, see feed.audience.
+    Nothing is published unless PUSH_EVENTS is set.
+    """
+    from .api import REVIEW_FIELDS, TICKET_FIELDS, serialize_post
+
+    if not settings.PUSH_EVENTS:
+        return
+    broker = get_broker()
+    recipients = broker.connected(feed.audience(author_id, extra_ids))
+    if not recipients:
+        return
+    posts = feed.load_posts([(kind, post_id)])
+    if not posts:
+        return
+    # Whether a review answers the ticket of the recipient is left to the client.
+    fields = {*TICKET_FIELDS, *REVIEW_FIELDS} - {'is_response'}
+    broker.publish(recipients, format_event('post', serialize_post(posts[0], fields), f'{kind}.{post_id}'))
+
+
+async def stream(user_id: int):
+    """
+    Stream the events of a user as long as the client stays connected. A comment is
+    sent when nothing happens, so proxies do not close the idle connection.
+    """
+    broker = get_broker()
+    subscription = broker.subscribe(user_id, asyncio.get_running_loop())
+    try:
+        yield f'retry: {settings.PUSH_RETRY_MS}\n\n'
+        while True:
+            messages = await subscription.receive(settings.PUSH_KEEPALIVE)
+            yield ''.join(messages) if messages else ': keepalive\n\n'
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,206 @@
+import itertools
+import re
+import unicodedata
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from . import feed, graph, models
+
+BATCH_SIZE = 1000
+
+WORD = re.compile(r'\w+')
+
+# Leftovers of elided articles and conjunctions (l'auteur, qu'il, jusqu'au)
+ELISIONS = {'qu', 'jusqu', 'lorsqu', 'puisqu', 'quoiqu'}
+
+TICKET_FIELDS = ('title', 'description', 'review_title', 'review_comment')
+REVIEW_FIELDS = ('headline', 'body')
+
+
+def stem(word: str) -> str:
+    """
+    Reduce a lowercase French word to its stem with the minimal stemmer of J. Savoy,
+    which removes plural and feminine endings only, so that it rarely merges unrelated words.
+    :param word: the word to stem.
+    :return: the stem.
+    """
+    if len(word) > 3 and word.endswith('x'):
+        return word[:-3] + 'al' if word.endswith('aux') else word[:-1]
+    for ending in 'sreé':
+        if len(word) > 3 and word.endswith(ending):
+            word = word[:-1]
+    if len(word) > 2 and word[-1] == word[-2] and word[-1].isalpha():
+        word = word[:-1]
+    return word
+
+
+def unaccent(word: str) -> str:
+    return ''.join(char for char in unicodedata.normalize('NFKD', word) if not unicodedata.combining(char))
+
+
+def terms(text: str):
+    """
+    Split a text into stemmed and unaccented search terms.
+    :param text: the text to analyze.
+    :return: the list of terms, in order.
+    """
+    return [
+        unaccent(stem(word)) for word in WORD.findall(text.lower())
+        if len(word) > 1 and word not in ELISIONS
+    ]
+
+
+def uses_fts5() -> bool:
+    """
+    Tell whether the index is an SQLite FTS5 table, analyzed here since SQLite has no
+    French stemmer. PostgreSQL stems the raw text itself with its 'french' configuration.
+    """
+    return connection.vendor == 'sqlite'
+
+
+def prepare(text: str) -> str:
+    """
+    Turn the text of a post into the document stored in the index.
+    """
+    return ' '.join(terms(text)) if uses_fts5() else text
+
+
+def document(post, fields) -> str:
+    return '\n'.join(value for value in (getattr(post, field) for field in fields) if value)
+
+
+def index_post(kind: str, post):
+    """
+    Add a ticket or a review to the search index, or refresh its indexed text.
+    :param kind: type of the post ('ticket' or 'review').
+    :param post: the Ticket or Review instance.
+    """
+    if kind == feed.TICKET:
+        ticket_author_id, text = post.user_id, document(post, TICKET_FIELDS)
+    else:
+        ticket_author_id, text = post.ticket.user_id, document(post, REVIEW_FIELDS)
+    models.SearchEntry.objects.update_or_create(kind=kind, post_id=post.id, defaults={
+        'author_id': post.user_id,
+        'ticket_author_id': ticket_author_id,
+        'time_created': post.time_created,
+        'document': prepare(text),
+    })
+
+
+def remove_post(kind: str, post_id: int):
+    models.SearchEntry.objects.filter(kind=kind, post_id=post_id).delete()
+
+
+def rebuild_index(author_ids=None) -> int:
+    """
+    Index the tickets and reviews again, after posts were written without signals.
+    Results are ordered by the creation time of the posts, so entries written again
+    keep their place in the results.
+    :param author_ids: IDs of the users whose posts are indexed again, every user by default.
+    :return: the number of indexed posts.
+    """
+    entries = models.SearchEntry.objects.all()
+    tickets = models.Ticket.objects.values_list('time_created', 'id', 'user_id', 'user_id', *TICKET_FIELDS)
+    reviews = models.Review.objects.values_list('time_created', 'id', 'user_id', 'ticket__user_id', *REVIEW_FIELDS)
+    if author_ids is not None:
+        entries = entries.filter(author_id__in=author_ids)
+        tickets = tickets.filter(user_id__in=author_ids)
+        reviews = reviews.filter(user_id__in=author_ids)
+    entries.delete()
+
+    def rows(kind, queryset):
+        for time_created, post_id, author_id, ticket_author_id, *texts in queryset.iterator(chunk_size=BATCH_SIZE):
+            yield time_created, kind, post_id, author_id, ticket_author_id, '\n'.join(text for text in texts if text)
+
+    count, batch = 0, []
+    for time_created, kind, post_id, author_id, ticket_author_id, text in itertools.chain(
+        rows(feed.TICKET, tickets), rows(feed.REVIEW, reviews)
+    ):
+        batch.append(models.SearchEntry(kind=kind, post_id=post_id, author_id=author_id,
+                                        ticket_author_id=ticket_author_id, time_created=time_created,
+                                        document=prepare(text)))
+        if len(batch) == BATCH_SIZE:
+            models.SearchEntry.objects.bulk_create(batch)
+            count, batch = count + len(batch), []
+    models.SearchEntry.objects.bulk_create(batch)
+    return count + len(batch)
+
+
+def matching(entries, query: str):
+    """
+    Restrict index entries to those matching all the words of a query.
+    The last word also matches longer words, so results show up while it is being typed.
+    :param entries: a SearchEntry queryset.
+    :param query: the text typed by the user.
+    :return: the filtered queryset.
+    """
+    if not uses_fts5():
+        return entries.annotate(
+            vector=SearchVector('document', config='french')
+        ).filter(vector=SearchQuery(query, config='french', search_type='websearch'))
+
+    words = terms(query)
+    if not words:
+        return entries.none()
+    expression = ' '.join(f'"{word}"' for word in words) + '*'
+    return entries.filter(id__in=RawSQL(
+        'SELECT rowid FROM blog_searchentry_fts WHERE blog_searchentry_fts MATCH %s', [expression]
+    ))
+
+
+def after_cursor(cursor) -> Q:
+    """
+    Keyset condition selecting the entries that come after the cursor.
+    Results are ordered as the feed: time_created descending, then kind, then post ID descending.
+    :param cursor: a decoded cursor.
+    :return: the filter to apply to the entries.
+    """
+    time_created, kind, post_id = cursor
+    return (
+        Q(time_created__lt=time_created)
+        | Q(time_created=time_created, kind__gt=kind)
+        | Q(time_created=time_created, kind=kind, post_id__lt=post_id)
+    )
+
+
+def search_rows(user, query: str, cursor=None):
+    """
+    Search the posts a user is allowed to see: their own, those of the users they follow
+    and the reviews of their tickets, except those of the users they blocked.
+    Results come newest first, in the order of the feed.
+    :param user: the user searching.
+    :param query: the text typed by the user.
+    :param cursor: a decoded cursor, or None for the first page.
+    :return: a queryset of (time_created, kind, post_id) tuples.
+    """
+    adjacency = graph.get_adjacency(user.id)
+    entries = models.SearchEntry.objects.filter(
+        Q(author_id__in=sorted(adjacency.following | {user.id})) | Q(ticket_author=user)
+    )
+    if adjacency.blocked:
+        entries = entries.exclude(author_id__in=sorted(adjacency.blocked))
+    if cursor is not None:
+        entries = entries.filter(after_cursor(cursor))
+    return matching(entries, query).order_by('-time_created', 'kind', '-post_id').values_list(
+        'time_created', 'kind', 'post_id'
+    )
+
+
+def get_search_page(user, query: str, cursor=None, page_size=None):
+    """
+    Load one page of the results of a search.
+    :param user: the user searching.
+    :param query: the text typed by the user.
+    :param cursor: a decoded cursor, or None for the first page.
+    :param page_size: number of posts per page, FEED_PAGE_SIZE by default.
+    :return: a (posts, next_cursor) tuple, next_cursor being None on the last page.
+    """
+    page_size = page_size or settings.FEED_PAGE_SIZE
+    rows = list(search_rows(user, query, cursor)[:page_size + 1])
+    posts = feed.load_posts([(kind, post_id) for _, kind, post_id in rows[:page_size]])
+    next_cursor = feed.encode_cursor(*rows[page_size - 1]) if len(rows) > page_size else None
+    return posts, next_cursor
@@ -0,0 +1,169 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import counters, feed, feed_cache, graph, models, push, search, timeline
+
+
+# The cached follow graph is dropped first, as timelines and feeds are rebuilt from it.
+
+@receiver(post_save, sender=models.UserFollows)
+def follow_saved_update_graph(sender, instance, **kwargs):
+    transaction.on_commit(partial(graph.invalidate, [instance.user_id, instance.followed_user_id]))
+
+
+@receiver(post_delete, sender=models.UserFollows)
+def follow_deleted_update_graph(sender, instance, **kwargs):
+    transaction.on_commit(partial(graph.invalidate, [instance.user_id, instance.followed_user_id]))
+
+
+# Timelines are written once the transaction is committed, so a cascade deleting
+# a user never materializes entries for a timeline that is going away.
+
+@receiver(post_save, sender=models.Ticket)
+def ticket_saved(sender, instance, created, **kwargs):
+    if created and timeline.is_enabled():
+        transaction.on_commit(partial(timeline.fan_out_ticket, instance.id))
+
+
+@receiver(post_delete, sender=models.Ticket)
+def ticket_deleted(sender, instance, **kwargs):
+    if timeline.is_enabled():
+        timeline.remove_post(feed.TICKET, instance.id)
+
+
+@receiver(post_save, sender=models.Review)
+def review_saved(sender, instance, created, **kwargs):
+    if created and timeline.is_enabled():
+        transaction.on_commit(partial(timeline.fan_out_review, instance.id))
+
+
+@receiver(post_delete, sender=models.Review)
+def review_deleted(sender, instance, **kwargs):
+    if timeline.is_enabled():
+        timeline.remove_post(feed.REVIEW, instance.id)
+        if models.Ticket.objects.filter(id=instance.ticket_id, user_id=instance.user_id).exists():
+            transaction.on_commit(partial(timeline.fan_out_ticket, instance.ticket_id))
+
+
+@receiver(post_save, sender=models.UserFollows)
+@receiver(post_delete, sender=models.UserFollows)
+def follow_changed(sender, instance, **kwargs):
+    if timeline.is_enabled():
+        transaction.on_commit(partial(timeline.rebuild_timeline, instance.user_id))
+
+
+# Cached feeds are evicted once the transaction is committed, after the timelines
+# are written, so a page computed in between is never cached under a live version.
+# Edited posts evict them too, since the version of a feed is the ETag of the API.
+
+def invalidate_on_commit(user_ids):
+    transaction.on_commit(partial(feed_cache.invalidate, user_ids))
+
+
+@receiver(post_save, sender=models.Ticket)
+@receiver(post_delete, sender=models.Ticket)
+def ticket_changed_evict_feeds(sender, instance, **kwargs):
+    invalidate_on_commit(feed.audience(instance.user_id))
+
+
+@receiver(post_save, sender=models.Review)
+@receiver(post_delete, sender=models.Review)
+def review_changed_evict_feeds(sender, instance, **kwargs):
+    # The feeds showing the reviewed ticket change too, since the ticket gets or loses its review.
+    ticket_author_id = instance.ticket.user_id
+    invalidate_on_commit(feed.audience(instance.user_id, [ticket_author_id]) | feed.audience(ticket_author_id))
+
+
+@receiver(post_save, sender=models.UserFollows)
+@receiver(post_delete, sender=models.UserFollows)
+def follow_changed_evict_feed(sender, instance, **kwargs):
+    invalidate_on_commit([instance.user_id])
+
+
+# New posts are pushed to the connected clients once committed, after the feeds are evicted.
+
+@receiver(post_save, sender=models.Ticket)
+def ticket_created_push(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(partial(push.publish_post, feed.TICKET, instance.id, instance.user_id))
+
+
+@receiver(post_save, sender=models.Review)
+def review_created_push(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(partial(push.publish_post, feed.REVIEW, instance.id, instance.user_id,
+                                      [instance.ticket.user_id]))
+
+
+# The search index is written in the transaction of the post, so both are always in sync.
+
+@receiver(post_save, sender=models.Ticket)
+def ticket_saved_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or set(update_fields) & {'user', 'time_created', *search.TICKET_FIELDS}:
+        search.index_post(feed.TICKET, instance)
+
+
+@receiver(post_delete, sender=models.Ticket)
+def ticket_deleted_unindex(sender, instance, **kwargs):
+    search.remove_post(feed.TICKET, instance.id)
+
+
+@receiver(post_save, sender=models.Review)
+def review_saved_index(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or set(update_fields) & {'user', 'ticket', 'time_created', *search.REVIEW_FIELDS}:
+        search.index_post(feed.REVIEW, instance)
+
+
+@receiver(post_delete, sender=models.Review)
+def review_deleted_unindex(sender, instance, **kwargs):
+    search.remove_post(feed.REVIEW, instance.id)
+
+
+# Counters are updated in the transaction of the write, by the difference between the
+# contributions of the row before and after it. Rows are saved in a transaction, see models.
+
+@receiver(pre_save, sender=models.Review)
+def review_saving_count(sender, instance, **kwargs):
+    instance._counted = None
+    if not instance._state.adding:
+        previous = models.Review.objects.filter(pk=instance.pk).values_list('ticket_id', 'user_id', 'rating')
+        for row in previous:
+            instance._counted = counters.review_counts(*row)
+
+
+@receiver(post_save, sender=models.Review)
+def review_saved_count(sender, instance, **kwargs):
+    counted = counters.review_counts(instance.ticket_id, instance.user_id, instance.rating)
+    counters.apply(counted, instance._counted)
+    instance._counted = counted
+
+
+@receiver(post_delete, sender=models.Review)
+def review_deleted_count(sender, instance, **kwargs):
+    counters.apply(removed=counters.review_counts(instance.ticket_id, instance.user_id, instance.rating))
+
+
+@receiver(pre_save, sender=models.UserFollows)
+def follow_saving_count(sender, instance, **kwargs):
+    instance._counted = None
+    if not instance._state.adding:
+        previous = models.UserFollows.objects.filter(pk=instance.pk).values_list(
+            'user_id', 'followed_user_id', 'is_blocked'
+        )
+        for row in previous:
+            instance._counted = counters.follow_counts(*row)
+
+
+@receiver(post_save, sender=models.UserFollows)
+def follow_saved_count(sender, instance, **kwargs):
+    counted = counters.follow_counts(instance.user_id, instance.followed_user_id, instance.is_blocked)
+    counters.apply(counted, instance._counted)
+    instance._counted = counted
+
+
+@receiver(post_delete, sender=models.UserFollows)
+def follow_deleted_count(sender, instance, **kwargs):
+    counters.apply(removed=counters.follow_counts(instance.user_id, instance.followed_user_id, instance.is_blocked))
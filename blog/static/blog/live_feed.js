@@ -0,0 +1,21 @@
+// Announce the posts pushed by the server while the first page of the feed is open,
+// instead of reloading the feed periodically.
+(function () {
+    const banner = document.getElementById('new-posts');
+    if (!banner || !window.EventSource) {
+        return;
+    }
+    let count = 0;
+    const announce = function (event) {
+        count = event.type === 'resync' ? Math.max(count, 1) : count + 1;
+        banner.textContent = count > 1 ? `${count} nouveaux posts, afficher` : 'Nouveau post, afficher';
+        banner.hidden = false;
+    };
+    const source = new EventSource(banner.dataset.url);
+    source.addEventListener('post', announce);
+    source.addEventListener('resync', announce);
+    banner.addEventListener('click', function () {
+        source.close();
+        window.location.reload();
+    });
+}());
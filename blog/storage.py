@@ -0,0 +1,41 @@
+import hashlib
+from pathlib import PurePosixPath
+
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage naming each file after the SHA-256 of its content, so the
+    same image uploaded twice is stored once.
+    """
+    prefix = 'tickets'
+
+    def save(self, name, content, max_length=None):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        suffix = PurePosixPath(name).suffix.lower()
+        name = f'{self.prefix}/{digest[:2]}/{digest}{suffix}'
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
+
+    def save_derived(self, name, content):
+        """
+        Save a file derived from a stored one under its exact name, unless it already exists.
+        :param name: name of the derived file.
+        :param content: a django File with the content to write.
+        :return: the name of the derived file.
+        """
+        if self.exists(name):
+            return name
+        return super().save(name, content)
+
+
+ticket_image_storage = ContentAddressedStorage()
+
+
+def get_ticket_image_storage():
+    return ticket_image_storage
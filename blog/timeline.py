@@ -0,0 +1,135 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+
+from . import feed, models
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+
+
+def is_enabled() -> bool:
+    """
+    Tell whether the fan-out-on-write engine is enabled by the FEED_FANOUT setting.
+    """
+    return settings.FEED_FANOUT
+
+
+def after_cursor(cursor) -> Q:
+    """
+    Keyset condition selecting the timeline entries that come after the cursor.
+    :param cursor: a decoded cursor.
+    :return: the filter to apply to the FeedEntry queryset.
+    """
+    time_created, kind, post_id = cursor
+    return (
+        Q(time_created__lt=time_created) |
+        Q(time_created=time_created, kind__gt=kind) |
+        Q(time_created=time_created, kind=kind, post_id__lt=post_id)
+    )
+
+
+def timeline_rows(user, cursor=None):
+    """
+    Read the materialized timeline of a user with a single range scan.
+    :param user: the owner of the timeline.
+    :param cursor: a decoded cursor, or None to start from the newest post.
+    :return: a queryset of (post_id, time_created, kind) tuples ordered as the feed.
+    """
+    entries = models.FeedEntry.objects.filter(owner=user)
+    if cursor is not None:
+        entries = entries.filter(after_cursor(cursor))
+    return entries.order_by('-time_created', 'kind', '-post_id').values_list('post_id', 'time_created', 'kind')
+
+
+def get_timeline_page(user, cursor=None, page_size=None):
+    """
+    Load one page of the materialized feed of a user.
+    :param user: the user whose feed is displayed.
+    :param cursor: a decoded cursor, or None for the first page.
+    :param page_size: number of posts per page, FEED_PAGE_SIZE by default.
+    :return: a (posts, next_cursor) tuple, next_cursor being None on the last page.
+    """
+    page_size = page_size or settings.FEED_PAGE_SIZE
+    rows = list(timeline_rows(user, cursor)[:page_size + 1])
+    return feed.paginate(rows, page_size)
+
+
+def remove_post(kind: str, post_id: int):
+    """
+    Remove a post from every timeline.
+    """
+    models.FeedEntry.objects.filter(kind=kind, post_id=post_id).delete()
+
+
+def publish_post(kind: str, post_id: int, time_created, viewer_ids):
+    """
+    Replace the timeline entries of a post by one entry per viewer.
+    """
+    with transaction.atomic():
+        remove_post(kind, post_id)
+        models.FeedEntry.objects.bulk_create(
+            (models.FeedEntry(owner_id=viewer_id, kind=kind, post_id=post_id, time_created=time_created)
+             for viewer_id in viewer_ids),
+            batch_size=BATCH_SIZE,
+        )
+
+
+def fan_out_ticket(ticket_id: int):
+    """
+    Materialize a ticket in the timelines of its audience.
+    A ticket answered by its own author is shown through that review only.
+    :param ticket_id: ID of the ticket, which may have been deleted since.
+    """
+    ticket = models.Ticket.objects.filter(id=ticket_id).first()
+    if ticket is None or models.Review.objects.filter(ticket=ticket, user_id=ticket.user_id).exists():
+        remove_post(feed.TICKET, ticket_id)
+    else:
+        publish_post(feed.TICKET, ticket.id, ticket.time_created, feed.audience(ticket.user_id))
+
+
+def fan_out_review(review_id: int):
+    """
+    Materialize a review in the timelines of its audience.
+    :param review_id: ID of the review, which may have been deleted since.
+    """
+    review = models.Review.objects.select_related('ticket').filter(id=review_id).first()
+    if review is None:
+        remove_post(feed.REVIEW, review_id)
+        return
+    ticket = review.ticket
+    publish_post(feed.REVIEW, review.id, review.time_created, feed.audience(review.user_id, [ticket.user_id]))
+    if ticket.user_id == review.user_id:
+        remove_post(feed.TICKET, ticket.id)
+
+
+def rebuild_timeline(user_id: int):
+    """
+    Recompute the whole timeline of a user from the query-based feed.
+    :param user_id: ID of the owner of the timeline, which may have been deleted since.
+    :return: the number of entries written.
+    """
+    user = User.objects.filter(id=user_id).first()
+    if user is None:
+        return 0
+    with transaction.atomic():
+        models.FeedEntry.objects.filter(owner=user).delete()
+        entries = models.FeedEntry.objects.bulk_create(
+            (models.FeedEntry(owner=user, kind=kind, post_id=post_id, time_created=time_created)
+             for post_id, time_created, kind in feed.feed_rows(user).iterator()),
+            batch_size=BATCH_SIZE,
+        )
+    return len(entries)
+
+
+def check_timeline(user):
+    """
+    Compare the materialized timeline of a user with the query-based feed.
+    :param user: the owner of the timeline.
+    :return: a (missing, unexpected) tuple of sets of (kind, post_id, time_created) keys.
+    """
+    expected = {(kind, post_id, time_created) for post_id, time_created, kind in feed.feed_rows(user)}
+    materialized = {(kind, post_id, time_created) for post_id, time_created, kind in timeline_rows(user)}
+    return expected - materialized, materialized - expected
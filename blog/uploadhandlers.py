@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+
+class LimitedTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Stream each uploaded file to a temporary file on disk, chunk by chunk, and stop
+    writing once it goes over UPLOAD_MAX_BYTES. The file still reports its full size,
+    so the form rejects it without ever reading it.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.written = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.written + len(raw_data) > settings.UPLOAD_MAX_BYTES:
+            self.written = settings.UPLOAD_MAX_BYTES + 1
+            return None
+        self.written += len(raw_data)
+        return super().receive_data_chunk(raw_data, start)
@@ -1,11 +1,12 @@
-from itertools import chain
-from . import forms, models
-from django.http import HttpRequest, HttpResponse
+from . import feed, feed_cache, follows, forms, graph, models, push, search
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_POST
 from django.contrib import messages
-from django.db.models import Q
-from django.db.models import F
 from django.contrib.auth import get_user_model
 User = get_user_model()
 
@@ -13,51 +14,88 @@ User = get_user_model()
 @login_required
 def home(request: HttpRequest) -> HttpResponse:
     """
-    Display the home feed with tickets and reviews from followed users.
+    Display the home feed with tickets and reviews from followed users, one page at a time.
+    :param request: HTTP request object, optionally carrying a 'cursor' query parameter.
+    :return: HTTP response rendering the home page 'home.html' with the posts of the page.
+    """
+    cursor = feed.decode_cursor(request.GET.get('cursor', ''))
+    posts, next_cursor = feed_cache.get_feed_page(request.user, cursor)
+    mark_reviews(posts, request.user)
+
+    return render(request, 'blog/home.html', {
+        'posts': posts,
+        'next_cursor': next_cursor,
+        'push_events': settings.PUSH_EVENTS,
+    })
+
+
+async def feed_events(request: HttpRequest) -> HttpResponse:
+    """
+    Stream the new posts of the feed of the user as Server-Sent Events, as they are created.
+    The stream stays open, so it must be served by an ASGI server, see webapp/asgi.py.
+    Under WSGI, the response would only be sent once the endless stream is over: a 204
+    response is sent instead, which tells the browser not to reconnect.
     :param request: HTTP request object.
-    :return: HTTP response rendering the home page 'home.html' with combined posts.
-    """
-    followed_users = models.UserFollows.objects.filter(
-        user=request.user,
-        is_blocked=False
-    ).values_list('followed_user', flat=True)
-
-    blocked_users = models.UserFollows.objects.filter(
-        user=request.user,
-        is_blocked=True
-    ).values_list('followed_user', flat=True)
-
-    tickets = models.Ticket.objects.filter(
-        Q(user=request.user) |
-        Q(user__in=followed_users)
-    ).exclude(
-        user__in=blocked_users
-    ).order_by('-time_created')
-
-    reviews = models.Review.objects.filter(
-        Q(user=request.user) |
-        Q(ticket__user=request.user) |
-        Q(user__in=followed_users)
-    ).exclude(
-        user__in=blocked_users
-    ).order_by('-time_created')
-
-    standalone_ticket_ids = reviews.filter(ticket__user=F('user')).values_list('ticket_id', flat=True)
-    tickets = tickets.exclude(id__in=standalone_ticket_ids)
-
-    combined_posts = chain(tickets, reviews)
-    combined_posts = sorted(combined_posts, key=lambda x: x.time_created, reverse=True)
-
-    for post in combined_posts:
+    :return: streaming HTTP response of 'text/event-stream' events, 204 under WSGI,
+        or 401 if the user is not logged in.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+    response = StreamingHttpResponse(push.stream(user.id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Proxies must forward each event as soon as it is written.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def mark_reviews(posts, user):
+    """
+    Flag the reviews answering a ticket of the user, and those answering a ticket of their own author.
+    :param posts: the tickets and reviews to display.
+    :param user: the user viewing the posts.
+    """
+    for post in posts:
         if isinstance(post, models.Review):
-            post.is_response = post.ticket.user == request.user and post.user != request.user
+            post.is_response = post.ticket.user == user and post.user != user
             post.is_standalone = post.ticket.user == post.user
 
-    return render(request, 'blog/home.html', {
-        'posts': combined_posts,
+
+@login_required
+def search_posts(request: HttpRequest) -> HttpResponse:
+    """
+    Search the tickets and reviews visible to the user, newest first, one page at a time.
+    :param request: HTTP request object, carrying the 'q' query and optionally a 'cursor'.
+    :return: HTTP response rendering the search page 'search.html' with the posts of the page.
+    """
+    form = forms.SearchForm(request.GET)
+    query = form.cleaned_data['q'].strip() if form.is_valid() else ''
+    posts, next_cursor = [], None
+    if query:
+        cursor = feed.decode_cursor(request.GET.get('cursor', ''))
+        posts, next_cursor = search.get_search_page(request.user, query, cursor)
+        mark_reviews(posts, request.user)
+
+    return render(request, 'blog/search.html', {
+        'form': form,
+        'query': query,
+        'posts': posts,
+        'next_cursor': next_cursor,
     })
 
 
+@staff_member_required
+def feed_cache_stats(request: HttpRequest) -> HttpResponse:
+    """
+    Expose the hit, miss and invalidation counters of the feed cache to the staff.
+    :param request: HTTP request object.
+    :return: JSON response with the counters of the current process.
+    """
+    return JsonResponse(feed_cache.get_stats())
+
+
 @login_required
 def create_review(request: HttpRequest, ticket_id: int) -> HttpResponse:
     """
@@ -68,11 +106,11 @@ def create_review(request: HttpRequest, ticket_id: int) -> HttpResponse:
     """
     ticket = get_object_or_404(models.Ticket, id=ticket_id)
 
-    if models.UserFollows.objects.filter(user=ticket.user, followed_user=request.user, is_blocked=True).exists():
+    if ticket.user_id in graph.get_adjacency(request.user.id).blocked_by:
         messages.error(request, "Vous ne pouvez pas répondre à ce ticket car vous avez été bloqué par l'auteur.")
         return redirect('home')
 
-    if models.Review.objects.filter(ticket=ticket).exists():
+    if ticket.has_review:
         messages.error(request, "Ce ticket a déjà une réponse.")
         return redirect('home')
 
@@ -200,7 +238,7 @@ def my_reviews(request):
     :param request: HTTP request object.
     :return: HTTP response rendering the review page 'my_review.html'.
     """
-    reviews = models.Review.objects.filter(user=request.user).order_by('-time_created')
+    reviews = models.Review.objects.filter(user=request.user).select_related('ticket').order_by('-time_created')
     return render(request, 'blog/my_reviews.html', {'reviews': reviews})
 
 
@@ -257,26 +295,6 @@ def follow_users(request):
     :param request: HTTP request object.
     :return: HTTP response rendering the followers, followed and blocked users page 'follow_users.html'
     """
-    followed = models.UserFollows.objects.filter(
-        user=request.user,
-        is_blocked=False
-    ).select_related('followed_user')
-
-    blocked = models.UserFollows.objects.filter(
-        user=request.user,
-        is_blocked=True
-    ).select_related('followed_user')
-
-    blocked_users = models.UserFollows.objects.filter(
-        user=request.user,
-        is_blocked=True
-    ).values_list('followed_user', flat=True)
-
-    followers = models.UserFollows.objects.filter(
-        followed_user=request.user,
-        is_blocked=False
-    ).exclude(user__in=blocked_users)
-
     if request.method == 'POST':
         form = forms.FollowUserForm(request.POST)
         if form.is_valid():
@@ -300,18 +318,75 @@ def follow_users(request):
 
             except User.DoesNotExist:
                 messages.error(request, "Utilisateur non trouvé")
+            # The lists are read again, with the change, by the redirected request.
+            return redirect('follow_users')
 
     else:
         form = forms.FollowUserForm()
 
+    adjacency = graph.get_adjacency(request.user.id)
+    users = sorted(
+        User.objects.filter(id__in=adjacency.following | adjacency.blocked | adjacency.followers),
+        key=lambda user: user.username
+    )
+
+    followed = [user for user in users if user.id in adjacency.following]
+    blocked = [user for user in users if user.id in adjacency.blocked]
+    followers = [user for user in users if user.id in adjacency.followers - adjacency.blocked]
+
     return render(request, 'blog/follow_users.html', {
         'form': form,
+        'bulk_form': forms.BulkFollowForm(),
         'followed_users': followed,
         'blocked_users': blocked,
         'followers': followers
     })
 
 
+STATUS_LEVELS = {
+    'followed': messages.SUCCESS, 'unfollowed': messages.SUCCESS, 'blocked': messages.SUCCESS,
+    'unblocked': messages.SUCCESS, 'self': messages.ERROR, 'unknown': messages.ERROR,
+    'still_blocked': messages.WARNING,
+}
+
+
+@login_required
+@require_POST
+def bulk_follow(request: HttpRequest) -> HttpResponse:
+    """
+    View to follow, unfollow, block or unblock a list of users at once, in a single transaction.
+    Browsers are redirected to the follow page with one message per status, other clients
+    receive the status of each username in JSON.
+    :param request: HTTP request object, with the action and the list of usernames.
+    :return: Redirects to the 'follow_users' view, or a JSON response with the results.
+    """
+    form = forms.BulkFollowForm(request.POST)
+    wants_html = request.accepts('text/html')
+    if not form.is_valid():
+        if wants_html:
+            for errors in form.errors.values():
+                messages.error(request, errors[0])
+            return redirect('follow_users')
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    action = form.cleaned_data['action']
+    results = follows.apply_changes(request.user, [(username, action) for username in form.cleaned_data['usernames']])
+
+    if not wants_html:
+        return JsonResponse({
+            'action': action,
+            'results': [{'username': username, 'status': status} for username, status in results],
+        })
+
+    by_status = {}
+    for username, status in results:
+        by_status.setdefault(status, []).append(username)
+    for status, usernames in by_status.items():
+        messages.add_message(request, STATUS_LEVELS.get(status, messages.INFO),
+                             f"{follows.STATUS_MESSAGES[status]} : {', '.join(usernames)}")
+    return redirect('follow_users')
+
+
 @login_required
 def unfollow_user(request: HttpRequest, username: str) -> HttpResponse:
     """
@@ -2,6 +2,8 @@
 ASGI config for webapp project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The stream of new posts, /home/events/, stays open as long as the feed is displayed:
+served by an ASGI server, it waits on the event loop instead of holding a thread.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -0,0 +1,184 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from webapp.storage import ENCODINGS
+
+# A SHA-256 in the path means the content never changes under that name.
+HASHED_NAME = re.compile(r'(?:^|/)([0-9a-f]{64})(?:[./]|$)')
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def parse_range(header: str, size: int):
+    """
+    Parse a single-range Range header.
+    :param header: value of the Range header.
+    :param size: size of the file in bytes.
+    :return: an inclusive (start, end) tuple, None if the header must be ignored,
+        or False if the range cannot be satisfied.
+    """
+    match = RANGE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if start == '':
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start, end = int(start), min(int(end), size - 1) if end else size - 1
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+def read_range(path, start: int, length: int):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve_file(request: HttpRequest, root, path: str, immutable: bool = False) -> HttpResponse:
+    """
+    Serve a file with validators, conditional requests and byte ranges.
+    Whole files go through FileResponse, which lets the server use sendfile. With
+    FILE_OFFLOAD set, only the headers are built and the server sends the bytes.
+    :param request: HTTP request object.
+    :param root: directory the file is served from.
+    :param path: path of the file relative to the root, as found in the URL.
+    :param immutable: whether the file never changes under its name.
+    :return: the HTTP response.
+    """
+    try:
+        full_path = safe_join(root, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    digest = HASHED_NAME.search(path)
+    etag = f'"{digest.group(1)}"' if digest else f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    last_modified = int(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = build_response(request, full_path, path, stat.st_size, etag, last_modified)
+
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(last_modified)
+    response.headers['Cache-Control'] = IMMUTABLE if immutable or digest else 'public, max-age=3600'
+    return response
+
+
+def build_response(request, full_path, path, size, etag, last_modified):
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+
+    byte_range = None
+    if 'Range' in request.headers and if_range_matches(request.headers.get('If-Range'), etag, last_modified):
+        byte_range = parse_range(request.headers['Range'], size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response.headers['Content-Range'] = f'bytes */{size}'
+        return response
+
+    offload = settings.FILE_OFFLOAD
+    if offload:
+        response = HttpResponse(content_type=content_type)
+        if offload == 'x-accel-redirect':
+            response.headers['X-Accel-Redirect'] = settings.FILE_OFFLOAD_PREFIX + path
+        else:
+            response.headers['X-Sendfile'] = full_path
+        response.headers['Accept-Ranges'] = 'bytes'
+        return response
+
+    if byte_range is None:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            read_range(full_path, start, end - start + 1), status=206, content_type=content_type
+        )
+        response.headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response.headers['Content-Length'] = str(end - start + 1)
+    response.headers['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def if_range_matches(if_range, etag, last_modified) -> bool:
+    """
+    Tell whether a range may be served given the If-Range header of the request.
+    """
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+@require_safe
+def serve_media(request: HttpRequest, path: str) -> HttpResponse:
+    """
+    Serve an uploaded file from MEDIA_ROOT.
+    :param request: HTTP request object.
+    :param path: path of the file relative to MEDIA_ROOT.
+    :return: the HTTP response with the file, or a 304/206/416 response.
+    """
+    return serve_file(request, settings.MEDIA_ROOT, path)
+
+
+def accepted_encodings(request: HttpRequest) -> set:
+    """
+    Read the content codings accepted by the client, leaving out those refused with q=0.
+    """
+    accepted = set()
+    for coding in request.headers.get('Accept-Encoding', '').split(','):
+        name, _, parameters = coding.strip().partition(';')
+        if parameters.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+@require_safe
+def serve_static(request: HttpRequest, path: str) -> HttpResponse:
+    """
+    Serve a collected static file from STATIC_ROOT, with its precompressed variant when
+    the client accepts it. The files named after their content by the manifest storage
+    are cached by browsers for a year without revalidation.
+    :param request: HTTP request object.
+    :param path: path of the file relative to STATIC_ROOT.
+    :return: the HTTP response with the file, or a 304/206/416 response.
+    """
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    immutable = path in getattr(staticfiles_storage, 'hashed_files', {}).values()
+    accepted = accepted_encodings(request)
+    for suffix, encoding in ENCODINGS.items():
+        if encoding in accepted and os.path.isfile(full_path + suffix):
+            response = serve_file(request, settings.STATIC_ROOT, path + suffix, immutable)
+            if response.status_code != 304:
+                response.headers['Content-Encoding'] = encoding
+            break
+    else:
+        response = serve_file(request, settings.STATIC_ROOT, path, immutable)
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
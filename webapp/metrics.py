@@ -0,0 +1,173 @@
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from contextvars import ContextVar
+from threading import Lock
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.http import HttpRequest, HttpResponse, JsonResponse
+
+# Buckets grow by a factor of 2^(1/4), so a percentile is off by 19% at most.
+BUCKET_BOUNDS = [0.0] + [0.01 * 2 ** (index / 4) for index in range(160)]
+PERCENTILES = (50, 90, 99)
+METRICS = ('latency_ms', 'db_queries', 'db_ms', 'template_ms', 'response_bytes')
+
+current_timings = ContextVar('current_timings', default=None)
+
+
+class Histogram:
+    """
+    Histogram of the values of a metric over logarithmic buckets.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.lock = Lock()
+
+    def record(self, value: float):
+        with self.lock:
+            self.counts[bisect_left(BUCKET_BOUNDS, value)] += 1
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+
+    def percentile(self, percent: float) -> float:
+        """
+        Upper bound of the bucket holding the given percentile of the values.
+        """
+        rank = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.max, self.max)
+        return 0.0
+
+    def summary(self) -> dict:
+        with self.lock:
+            summary = {f'p{percent}': round(self.percentile(percent), 2) for percent in PERCENTILES}
+            summary.update(count=self.count, mean=round(self.total / self.count, 2) if self.count else 0.0,
+                           max=round(self.max, 2))
+        return summary
+
+
+class Registry:
+    """
+    Histograms of the request metrics of this process, by URL name.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+        self.lock = Lock()
+
+    def record(self, url_name: str, values: dict):
+        with self.lock:
+            histograms = self.histograms.get(url_name)
+            if histograms is None:
+                histograms = self.histograms[url_name] = {metric: Histogram() for metric in METRICS}
+        for metric, value in values.items():
+            histograms[metric].record(value)
+
+    def summary(self) -> dict:
+        with self.lock:
+            histograms = dict(self.histograms)
+        return {
+            url_name: {metric: histogram.summary() for metric, histogram in metrics.items()}
+            for url_name, metrics in sorted(histograms.items())
+        }
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+
+
+registry = Registry()
+
+
+class Timings:
+    """
+    Measures of the request being processed.
+    """
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """
+        Database execute wrapper counting and timing the queries.
+        """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - start
+            self.db_queries += 1
+
+
+def record_template_render(seconds: float):
+    """
+    Add the render time of a template to the measures of the current request.
+    """
+    timings = current_timings.get()
+    if timings is not None:
+        timings.template_seconds += seconds
+
+
+class PerformanceMiddleware:
+    """
+    Measure the latency, database queries, template rendering and response size of
+    each request, report them in a Server-Timing header and record them by URL name.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        timings = Timings()
+        token = current_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        latency = time.perf_counter() - start
+
+        if response.streaming:
+            size = int(response.get('Content-Length', 0))
+        else:
+            size = len(response.content)
+
+        response.headers['Server-Timing'] = ', '.join([
+            f'db;dur={timings.db_seconds * 1000:.1f};desc="{timings.db_queries} queries"',
+            f'tpl;dur={timings.template_seconds * 1000:.1f}',
+            f'total;dur={latency * 1000:.1f}',
+        ])
+
+        match = getattr(request, 'resolver_match', None)
+        registry.record(match.url_name if match and match.url_name else 'other', {
+            'latency_ms': latency * 1000,
+            'db_queries': timings.db_queries,
+            'db_ms': timings.db_seconds * 1000,
+            'template_ms': timings.template_seconds * 1000,
+            'response_bytes': size,
+        })
+        return response
+
+
+@staff_member_required
+def performance_stats(request: HttpRequest) -> HttpResponse:
+    """
+    Expose the percentiles of the request metrics of this process to the staff.
+    :param request: HTTP request object.
+    :return: JSON response with the summary of each metric, by URL name.
+    """
+    return JsonResponse(registry.summary())
@@ -1,5 +1,8 @@
+import os
 from pathlib import Path
 
+from webapp.db import database_from_url
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -30,6 +33,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'webapp.metrics.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -43,17 +47,25 @@ ROOT_URLCONF = 'webapp.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'webapp.templates.InstrumentedDjangoTemplates',
         'DIRS': [
             BASE_DIR.joinpath('templates'),
         ],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'blog.context_processors.post_cards',
+            ],
+            # Templates are compiled once per process, even with DEBUG: the development
+            # server empties this cache whenever a template file changes.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
             ],
         },
     },
@@ -65,11 +77,19 @@ WSGI_APPLICATION = 'webapp.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# The database is set by the DATABASE_URL environment variable, see webapp/db.py.
+# DATABASE_PROFILE selects the SQLite connection options and DATABASE_CONN_MAX_AGE
+# how long, in seconds, connections are kept open between requests. The 'tuned' profile
+# switches the database file to write-ahead logging for good, which would rewrite the
+# db.sqlite3 tracked by git: development keeps the options of SQLite by default.
+DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'default' if DEBUG else 'tuned')
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_from_url(
+        os.environ.get('DATABASE_URL', f'sqlite:///{BASE_DIR / "db.sqlite3"}'),
+        profile=DATABASE_PROFILE,
+        conn_max_age=int(os.environ.get('DATABASE_CONN_MAX_AGE', 60)),
+    ),
 }
 
 
@@ -84,25 +104,13 @@ AUTH_PASSWORD_VALIDATORS = [
         'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
     },
     {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+        'NAME': 'authentication.validators.PreloadedCommonPasswordValidator',
     },
     {
         'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
     },
     {
-        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
-    },
-    {
-        'NAME': 'authentication.validators.ContainsLetterValidator',
-    },
-    {
-        'NAME': 'authentication.validators.ContainsUppercaseValidator',
-    },
-    {
-        'NAME': 'authentication.validators.ContainsLowercaseValidator',
-    },
-    {
-        'NAME': 'authentication.validators.ContainsSpecialCharacterValidator',
+        'NAME': 'authentication.validators.CharacterClassesValidator',
     },
 ]
 
@@ -124,6 +132,23 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# In production, 'python manage.py collectstatic' copies the static files to STATIC_ROOT
+# under names carrying a hash of their content, with gzip variants, and brotli ones
+# with requirements-brotli.txt. They are served by webapp.files.serve_static, the
+# hashed names being cached by browsers for a year. With DEBUG, the files are served
+# under their own names by the development server.
+STATIC_ROOT = BASE_DIR.joinpath('staticfiles/')
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+        else 'webapp.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -131,8 +156,151 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'authentication.User'
 
+# Passwords are hashed with the profile set by PASSWORD_HASHING: 'pbkdf2' (PBKDF2-SHA256
+# with PBKDF2_ITERATIONS rounds), 'scrypt' (SCRYPT_WORK_FACTOR) or 'argon2' (pip install
+# -r requirements-argon2.txt). The hashes of the other profiles are still checked, and
+# rehashed with the selected profile and cost when their user logs in.
+PASSWORD_HASHER_PROFILES = {
+    'pbkdf2': 'authentication.hashers.TunedPBKDF2PasswordHasher',
+    'scrypt': 'authentication.hashers.TunedScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+}
+PASSWORD_HASHING = os.environ.get('PASSWORD_HASHING', 'pbkdf2')
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_PROFILES[PASSWORD_HASHING],
+    *(hasher for profile, hasher in PASSWORD_HASHER_PROFILES.items() if profile != PASSWORD_HASHING),
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+# The costs default to those of the Django hashers (None), which grow with each release.
+# A lower cost is an explicit choice: the hashes of stronger costs are rehashed, so
+# weakened, at the next login of their user.
+PBKDF2_ITERATIONS = int(os.environ['PBKDF2_ITERATIONS']) if 'PBKDF2_ITERATIONS' in os.environ else None
+SCRYPT_WORK_FACTOR = int(os.environ['SCRYPT_WORK_FACTOR']) if 'SCRYPT_WORK_FACTOR' in os.environ else None
+
+# Passwords are checked at login by a pool of LOGIN_WORKERS threads, 0 checking them in
+# the request thread. Beyond LOGIN_QUEUE waiting logins, logins are refused with a 503
+# response asking to retry after LOGIN_RETRY_AFTER seconds.
+LOGIN_WORKERS = int(os.environ.get('LOGIN_WORKERS', os.cpu_count() or 1))
+LOGIN_QUEUE = 16
+LOGIN_RETRY_AFTER = 5
+
+# Submissions of the login and signup forms allowed per client IP address and per
+# username, as (attempts, sliding window in seconds), see authentication/ratelimit.py.
+# The counters are kept in the 'ratelimit' cache, local to each process here.
+RATE_LIMITS = {
+    'login': {'ip': (30, 60), 'username': (10, 300)},
+    'signup': {'ip': (10, 3600)},
+}
+# META key of the client address: 'HTTP_X_FORWARDED_FOR' behind a reverse proxy
+RATE_LIMIT_IP_HEADER = 'REMOTE_ADDR'
+
+# The user of each request is read from the cache, see authentication/backends.py.
+# The default cache is local to each process: a saved user is only dropped from the
+# cache of the process that saved it, and the other processes keep serving the old
+# user, including its old password hash for the session checks, for up to
+# USER_CACHE_TIMEOUT seconds. With several processes, this delay is the time a
+# password change or a deactivation takes to log out the other sessions, unless the
+# default cache is shared between them (Redis, Memcached).
+AUTHENTICATION_BACKENDS = ['authentication.backends.CachedModelBackend']
+USER_CACHE_TIMEOUT = 30
+
+# Sessions are stored according to SESSION_BACKEND: in the database ('db'), in the
+# cache backed by the database ('cached_db'), in the cache only ('cache'), in files
+# ('file') or in a signed cookie ('signed_cookies'). The 'sessions' cache is local
+# to each process here: with several processes, use a shared cache or signed cookies.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'file': 'django.contrib.sessions.backends.file',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('SESSION_BACKEND', 'cached_db')]
+SESSION_CACHE_ALIAS = 'sessions'
+
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'home'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR.joinpath('media/')
+
+# Leave the sending of served files to the web server: None, 'x-accel-redirect' (nginx,
+# with FILE_OFFLOAD_PREFIX mapped to an internal location) or 'x-sendfile' (Apache)
+FILE_OFFLOAD = None
+FILE_OFFLOAD_PREFIX = '/protected-media/'
+
+# Ticket images are resized off the request by a pool of worker threads ('thread'),
+# or kept in a local queue drained by blog.images.run_pending ('queue')
+IMAGE_PROCESSING_BACKEND = 'thread'
+IMAGE_PROCESSING_WORKERS = 2
+
+# Uploads are streamed to disk and rejected above these limits, before the image is decoded
+FILE_UPLOAD_HANDLERS = ['blog.uploadhandlers.LimitedTemporaryFileUploadHandler']
+UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+# JPEG images are decoded at a reduced scale, the other formats in full: an RGBA image
+# of UPLOAD_MAX_PIXELS_UNREDUCED pixels takes 48 MB once decoded
+UPLOAD_MAX_PIXELS = 40_000_000
+UPLOAD_MAX_PIXELS_UNREDUCED = 12_000_000
+
+# Number of posts displayed per page of the home feed
+FEED_PAGE_SIZE = 20
+
+# Materialize the feed of each user on writes (fan-out-on-write) instead of querying it on reads
+FEED_FANOUT = False
+
+# Lifetime in seconds of the cached pages of the home feed, 0 disables the cache
+FEED_CACHE_TIMEOUT = 300
+
+# Lifetime in seconds of the version of each cached feed, which is also the ETag of the
+# API: with a cache local to each process, the other processes see a change after this delay at most
+FEED_VERSION_TIMEOUT = 300
+
+# Lifetime in seconds of the rendered card of each post, cached until the post is edited, 0 disables the cache
+POST_CARD_TIMEOUT = 3600
+
+# The cards of the posts and the sessions have caches of their own, large enough to
+# hold several pages of feed, so that they never evict the cached feeds, follow
+# relations and users. The default cache holds, for each active user, a feed version,
+# a few feed pages, an adjacency and the user itself: culling it early would drop
+# versions, and with them the ETags of the API.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 100_000},
+    },
+    'post_cards': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'post-cards',
+        'OPTIONS': {'MAX_ENTRIES': 10_000},
+    },
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+        'OPTIONS': {'MAX_ENTRIES': 10_000},
+    },
+    'ratelimit': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ratelimit',
+        'OPTIONS': {'MAX_ENTRIES': 100_000},
+    },
+}
+
+# Lifetime in seconds of the cached follow relations of each user, which are also dropped on every change
+FOLLOW_GRAPH_TIMEOUT = 3600
+
+# Maximum number of usernames in one bulk follow, unfollow or block request
+BULK_FOLLOW_MAX = 1000
+
+# New posts are pushed to the open feeds with Server-Sent Events, see blog/push.py.
+# The streams stay open, so PUSH_EVENTS is only to be set when the application is
+# served by an ASGI server: under WSGI, each stream would hold a worker thread.
+# The local broker only reaches the clients of its own process.
+PUSH_EVENTS = os.environ.get('PUSH_EVENTS', '') == '1'
+PUSH_BROKER = 'blog.push.LocalBroker'
+# Seconds between two keep-alive comments on an idle stream
+PUSH_KEEPALIVE = 15
+# Delay in milliseconds before a browser reconnects a dropped stream
+PUSH_RETRY_MS = 5000
+# Messages kept for a slow client before it is asked to reload its feed
+PUSH_MAX_PENDING = 100
@@ -0,0 +1,54 @@
+"""
+Storage of the collected static files: names carrying a hash of their content,
+and precompressed variants served by webapp.files.serve_static.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Images are already compressed: only text formats get compressed variants.
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.json', '.map', '.svg', '.txt', '.html', '.xml')
+
+# Content-Encoding of each variant, by file suffix, most efficient first
+ENCODINGS = {'.br': 'br', '.gz': 'gzip'}
+
+
+def compressors():
+    """
+    Compression functions of the available encodings, by file suffix.
+    """
+    available = {'.gz': lambda content: gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        available['.br'] = lambda content: brotli.compress(content, quality=11)
+    return available
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest storage also writing a gzip variant, and a brotli one when the brotli
+    package is installed, of each hashed text file, when it is smaller than the file.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for name in set(self.hashed_files.values()):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(name)
+
+    def compress(self, name: str):
+        with self.open(name) as file:
+            content = file.read()
+        for suffix, compress in compressors().items():
+            compressed = compress(content)
+            if len(compressed) < len(content):
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                self._save(name + suffix, ContentFile(compressed))
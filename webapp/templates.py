@@ -0,0 +1,38 @@
+import time
+
+from django.template.backends.django import DjangoTemplates
+
+from .metrics import record_template_render
+
+
+class TimedTemplate:
+    """
+    Wrapper around a backend template recording its render time.
+    """
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            record_template_render(time.perf_counter() - start)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """
+    Django template backend timing each template rendered by a view.
+    Included templates are rendered by the engine directly, so they are counted
+    once, within the template including them.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
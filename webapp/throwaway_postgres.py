@@ -0,0 +1,59 @@
+"""
+Run the test suite against a throwaway local PostgreSQL instance:
+
+    python -m webapp.throwaway_postgres [test labels...]
+
+The cluster is created with initdb in a temporary directory, only listens on a Unix
+socket and is removed once the tests are done. The PostgreSQL server binaries
+(initdb, pg_ctl) and psycopg (requirements-postgres.txt) must be installed.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def find_binary(name: str) -> str:
+    """
+    Locate a PostgreSQL server binary, in PG_BINDIR or in the PATH.
+    :param name: name of the binary.
+    :return: the path of the binary.
+    """
+    path = shutil.which(name, path=os.environ.get('PG_BINDIR')) or shutil.which(name)
+    if path is None:
+        sys.exit(f"{name} introuvable : installez PostgreSQL ou renseignez PG_BINDIR.")
+    return path
+
+
+def main(labels) -> int:
+    """
+    Start a temporary cluster, run the tests against it, then stop and remove it.
+    :param labels: test labels passed to manage.py test.
+    :return: the exit code of the test run.
+    """
+    initdb, pg_ctl = find_binary('initdb'), find_binary('pg_ctl')
+    with tempfile.TemporaryDirectory(prefix='litrevu-pg-') as directory:
+        data = Path(directory) / 'data'
+        subprocess.run(
+            [initdb, '-D', data, '-U', 'litrevu', '--auth=trust', '--encoding=UTF8', '--no-sync'],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+        subprocess.run(
+            [pg_ctl, '-D', data, '-l', Path(directory) / 'server.log', '-w', 'start',
+             '-o', f"-c listen_addresses='' -k {directory} -c fsync=off"],
+            check=True, stdout=subprocess.DEVNULL,
+        )
+        try:
+            env = dict(os.environ, DATABASE_URL=f'postgres://litrevu@/postgres?host={directory}')
+            command = [sys.executable, BASE_DIR / 'manage.py', 'test', *labels]
+            return subprocess.run(command, cwd=BASE_DIR, env=env).returncode
+        finally:
+            subprocess.run([pg_ctl, '-D', data, '-m', 'fast', 'stop'], stdout=subprocess.DEVNULL)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -1,21 +1,34 @@
 from django.contrib import admin
-from django.urls import path
+import re
+
+from django.urls import path, re_path
 from django.conf import settings
-from django.conf.urls.static import static
 
 import authentication.views
+import blog.api
 import blog.views
+import webapp.files
+import webapp.metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', authentication.views.login_page, name='login'),
     path('logout/', authentication.views.logout_user, name='logout'),
     path('home/', blog.views.home, name='home'),
+    path('search/', blog.views.search_posts, name='search'),
+    path('api/feed/', blog.api.feed_page, name='api_feed'),
+    path('api/tickets/', blog.api.my_tickets, name='api_tickets'),
+    path('api/reviews/', blog.api.my_reviews, name='api_reviews'),
+    path('api/follows/<str:relation>/', blog.api.follows, name='api_follows'),
+    path('stats/feed-cache/', blog.views.feed_cache_stats, name='feed_cache_stats'),
+    path('stats/performance/', webapp.metrics.performance_stats, name='performance_stats'),
+    path('stats/rate-limits/', authentication.views.rate_limit_stats, name='rate_limit_stats'),
     path('signup/', authentication.views.signup_page, name='signup'),
     path('create_review/<int:ticket_id>/', blog.views.create_review, name='create_review'),
     path('create_review_and_ticket/', blog.views.create_review_and_ticket, name='create_review_and_ticket'),
     path('create_ticket/', blog.views.create_ticket, name='create_ticket'),
     path('follow/', blog.views.follow_users, name='follow_users'),
+    path('follow/bulk/', blog.views.bulk_follow, name='bulk_follow'),
     path('unfollow/<str:username>/', blog.views.unfollow_user, name='unfollow_user'),
     path('block/<str:username>/', blog.views.block_user, name='block_user'),
     path('unblock/<str:username>/', blog.views.unblock_user, name='unblock_user'),
@@ -26,6 +39,14 @@ urlpatterns = [
     path('review/<int:review_id>/edit/', blog.views.edit_review, name='edit_review'),
     path('review/<int:review_id>/delete/', blog.views.delete_review, name='delete_review'),
 ]
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# The stream of new posts is only routed when it is served by an ASGI server.
+push_urlpatterns = [
+    path('home/events/', blog.views.feed_events, name='feed_events'),
+]
+if settings.PUSH_EVENTS:
+    urlpatterns += push_urlpatterns
+
+urlpatterns += [
+    re_path(rf'^{re.escape(settings.MEDIA_URL.lstrip("/"))}(?P<path>.*)$', webapp.files.serve_media, name='media'),
+    re_path(rf'^{re.escape(settings.STATIC_URL.lstrip("/"))}(?P<path>.*)$', webapp.files.serve_static, name='static'),
+]